@@ -1,23 +1,33 @@
+import atexit
 import httpx  # Alternative to requests
 from selectolax.parser import HTMLParser  # Faster alternative to BeautifulSoup
-import pdfplumber  # Alternative to PyMuPDF for PDF parsing
+import multiprocessing
 import os
 import re
-from dateutil import parser  # Better for handling different date formats
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from date_extractor import extract_dates  # Precompiled patterns for KTU date formats
+from http_cache import cached_parse
+from timetable_store import TimetableStore
+import pdf_text
+import tracing
 
 # URL of the KTU timetable page
 KTU_URL = "https://ktu.edu.in/exam/timetable"
 
 # Step 1: Fetch the webpage and extract PDF titles and links
-def get_pdf_details():
-    try:
-        response = httpx.get(KTU_URL, timeout=10, verify=False)
+@tracing.traced("fetch_listing", "network")
+def fetch_listing(url, headers):
+    """Conditional GET used by the HTTP cache; a 304 is passed through."""
+    response = httpx.get(url, headers=headers, timeout=10, verify=False)
+    if response.status_code != 304:
         response.raise_for_status()
-    except httpx.RequestError as e:
-        print(f"Error fetching the webpage: {e}")
-        return []
-    
-    soup = HTMLParser(response.text)  # Faster HTML parsing
+    return response.status_code, response.text, response.headers
+
+def parse_pdf_listing(html):
+    soup = HTMLParser(html)  # Faster HTML parsing
     pdf_details = []
     
     # Extract all <a> tags with PDF links
@@ -31,55 +41,178 @@ def get_pdf_details():
     
     return pdf_details
 
+def get_pdf_details():
+    """Returns the PDF list from the timetable page, cached on disk and revalidated after the TTL."""
+    try:
+        return cached_parse(KTU_URL, fetch_listing, parse_pdf_listing, namespace="KTUTT")
+    except httpx.HTTPError as e:
+        print(f"Error fetching the webpage: {e}")
+        return []
+
+# Dates are parsed straight from the downloaded bytes, one PDF per worker task
+# Fastest engine that keeps timetable rows intact (benchmarks/bench_pdf_backends.py)
+PDF_BACKEND = "pymupdf"
+
+def extract_dates_from_text(text):
+    """Extracts every date found in a page of timetable text."""
+    return extract_dates(text)  # Single regex pass, dateutil only for ambiguous tokens
+
+def parse_pdf_dates(pdf_bytes):
+    """Worker: (page count, dates found) for one in-memory PDF; (0, []) when it cannot be read."""
+    try:
+        pages = pdf_text.extract_pages(pdf_bytes, backend=PDF_BACKEND)
+    except Exception as e:
+        print(f"Error reading PDF: {e}")
+        return 0, []
+    exam_dates = []
+    for text in pages:
+        exam_dates.extend(extract_dates_from_text(text))
+    return len(pages), exam_dates
+
+# Parser processes are started with "spawn" and kept for reuse: the Flask backends call
+# in from server threads, and forking a multithreaded process can deadlock. One pool
+# sized to the CPU count serves every request; a pool broken by a crashed worker is
+# replaced on the next call
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Shared parser pool, started on first use and shut down at exit."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def discard_pool(pool):
+    """Shuts down a broken pool so get_pool() starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown()
+
+def _map_bounded(pool, function, items, limit):
+    """pool.map() with at most `limit` tasks in flight; results in input order."""
+    results = [None] * len(items)
+    pending = {}
+    for index, item in enumerate(items):
+        if len(pending) >= limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+        pending[pool.submit(function, item)] = index
+    for future in as_completed(pending):
+        results[pending[future]] = future.result()
+    return results
+
+@tracing.traced("parse_timetable_pdfs", "pdf")
+def extract_dates_from_pdfs(pdf_contents, workers=None):
+    """
+    Returns one list of dates per in-memory PDF, in input order. Each PDF is one task
+    on the shared parser pool, its bytes sent along, with at most `workers` PDFs
+    (defaults to the CPU count) parsed at once; `workers=1` parses in-process.
+    """
+    tracing.count("pdf.bytes", sum(len(pdf_bytes) for pdf_bytes in pdf_contents))
+    workers = min(workers or os.cpu_count() or 1, len(pdf_contents))
+    if workers <= 1:
+        results = [parse_pdf_dates(pdf_bytes) for pdf_bytes in pdf_contents]
+    else:
+        for attempt in range(2):
+            pool = get_pool()
+            try:
+                results = _map_bounded(pool, parse_pdf_dates, pdf_contents, workers)
+                break
+            except BrokenProcessPool:
+                # A worker died (out of memory, parser crash): retry once on a fresh pool
+                discard_pool(pool)
+                if attempt:
+                    raise
+                print("⚠ PDF parser pool crashed; restarting it")
+
+    tracing.count("pdf.pages", sum(page_count for page_count, _ in results))
+    return [dates for _, dates in results]
+
+def extract_dates_from_pdf(pdf_bytes):
+    """One PDF for the store refresher: parsed in-process, a pool would cost more than it saves."""
+    return extract_dates_from_pdfs([pdf_bytes], workers=1)[0]
+
+def title_matches(course_code, title):
+    return re.search(rf"\b{re.escape(course_code)}\b", title, re.IGNORECASE) is not None
+
+@tracing.traced("fetch_pdf", "network")
+def fetch_pdf(url, headers=None):
+    """Conditional GET for a timetable PDF; a 304 is passed through."""
+    response = httpx.get(url, headers=headers or {}, timeout=10)
+    if response.status_code != 304:
+        response.raise_for_status()
+    tracing.count("network.bytes", len(response.content))
+    return response.status_code, response.content, response.headers
+
+# Warm local copy of every timetable PDF's dates, filled by a background refresher
+store = TimetableStore("KTUTT", get_pdf_details, fetch_pdf, extract_dates_from_pdf, title_matches)
+
 # Step 2: Extract exam timetable from PDFs
-def extract_exam_timetable(course_code):
+@tracing.traced()
+def extract_exam_timetables(course_codes, workers=None, use_store=True):
+    """
+    Returns {course_code: sorted exam dates} for several courses at once. Each
+    relevant PDF is downloaded and parsed once, however many courses it covers.
+    Answers from the warm store when it is fresh.
+    """
+    course_codes = list(dict.fromkeys(course_codes))  # Drop duplicates, keep order
+    
+    if use_store:
+        stored = store.lookup_many(course_codes)
+        if stored is not None:
+            return {code: sorted(set(date for dates in stored[code] for date in dates)) for code in course_codes}
+    
+    exam_dates = {code: set() for code in course_codes}
     pdf_details = get_pdf_details()
     
     if not pdf_details:
         print("No PDFs found on the page.")
-        return []
+        return {code: [] for code in course_codes}
     
-    exam_dates = []
+    pdf_contents, pdf_courses = [], []
     
-    for i, pdf in enumerate(pdf_details):
-        if not re.search(rf"\b{re.escape(course_code)}\b", pdf["title"], re.IGNORECASE):
-            continue  # Skip PDFs that don't match the course
-        
-        pdf_path = f"timetable_{i}.pdf"
+    for pdf in pdf_details:
+        matching = [code for code in course_codes if title_matches(code, pdf["title"])]
+        if not matching:
+            continue  # Skip PDFs that don't match any course
         
         try:
-            # Download PDF
-            pdf_response = httpx.get(pdf["url"], timeout=10)
-            pdf_response.raise_for_status()
-            with open(pdf_path, "wb") as pdf_file:
-                pdf_file.write(pdf_response.content)
-            
-            # Parse PDF using PDFPlumber
-            with pdfplumber.open(pdf_path) as doc:
-                for page in doc.pages:
-                    text = page.extract_text()
-                    
-                    if text:
-                        # Extract dates using dateutil.parser
-                        for word in text.split():
-                            try:
-                                parsed_date = parser.parse(word, fuzzy=True, dayfirst=True)
-                                exam_dates.append(parsed_date.strftime("%d %b %Y"))
-                            except ValueError:
-                                continue  # Skip non-date text
-        
-        except httpx.RequestError as e:
+            # Download PDF into memory
+            pdf_contents.append(fetch_pdf(pdf["url"])[1])
+            pdf_courses.append(matching)
+        except httpx.HTTPError as e:
             print(f"Error downloading {pdf['url']}: {e}")
-        finally:
-            # Clean up downloaded PDF
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
     
-    return sorted(set(exam_dates))  # Remove duplicates & sort dates
+    # One parse of every PDF, with the dates routed to each course it covers
+    for dates, matching in zip(extract_dates_from_pdfs(pdf_contents, workers), pdf_courses):
+        for code in matching:
+            exam_dates[code].update(dates)
+    
+    return {code: sorted(dates) for code, dates in exam_dates.items()}  # Remove duplicates & sort dates
+
+def extract_exam_timetable(course_code, workers=None, use_store=True):
+    """Returns the sorted exam dates for one course; see extract_exam_timetables."""
+    return extract_exam_timetables([course_code], workers, use_store)[course_code]
 
 if __name__ == "__main__":
+    sys.argv[1:] = tracing.enable_from_argv(sys.argv[1:])  # --trace[=file.json]
     course_code = input("Enter the course code (e.g., MBA S4): ").strip()
-    exam_schedule = extract_exam_timetable(course_code)
+    try:
+        exam_schedule = extract_exam_timetable(course_code)
+    except Exception as e:
+        print(f"Error fetching the exam timetable: {e}")
+        exam_schedule = []
     
     if exam_schedule:
         print("Extracted Exam Dates:", exam_schedule)
@@ -1,7 +1,8 @@
-import requests
 from bs4 import BeautifulSoup
 import re
 import os
+from pyq_downloader import fetch_with_retries, download_files, print_download_summary
+from course_resolver import resolve_course_urls, remember_course_format, forget_course_format
 
 def format_course_url(course_code, course_name, format_type=1):
     """
@@ -29,47 +30,45 @@ def extract_file_id(drive_url):
     match = re.search(r'(file/d/|id=)([\w-]+)', drive_url)
     return match.group(2) if match else None
 
-def download_google_drive_file(file_id, save_path):
-    """Download a file from Google Drive using its file ID."""
-    url = f"https://drive.google.com/uc?export=download&id={file_id}"
-    response = requests.get(url, stream=True)
-    
-    if response.status_code == 200:
-        with open(save_path, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        print(f"✅ File downloaded: {save_path}")
-    else:
-        print(f"❌ Failed to download file. Status code: {response.status_code}")
-
 def download_question_papers(course_code, course_name, download_folder):
     """
     Fetch and download question papers for the given course code and name.
-    Tries 3 different URL formats.
+    Tries 3 different URL formats, probed concurrently. The format that works
+    is remembered per course code so later runs go straight to it.
+    Papers are downloaded concurrently.
     """
-    for format_type in range(1, 4):
-        url = format_course_url(course_code, course_name, format_type)
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            print(f"✅ Fetching papers from: {url}")
-            course_folder = os.path.join(download_folder, f"{course_code}_{course_name.replace(' ', '_')}")
-            os.makedirs(course_folder, exist_ok=True)
+    for use_cache in (True, False):
+        for format_type, url in resolve_course_urls(course_code, course_name, format_course_url, use_cache):
+            response = fetch_with_retries(url)
+
+            if response.status_code == 200:
+                print(f"✅ Fetching papers from: {url}")
+                course_folder = os.path.join(download_folder, f"{course_code}_{course_name.replace(' ', '_')}")
+                os.makedirs(course_folder, exist_ok=True)
+
+                soup = BeautifulSoup(response.text, 'html.parser')
+                question_links = [link['href'] for link in soup.find_all('a', href=True) if 'drive.google.com' in link['href']]
+
+                if question_links:
+                    remember_course_format(course_code, format_type)
+                    jobs = []
+                    for i, link in enumerate(question_links):
+                        file_id = extract_file_id(link)
+                        if file_id:
+                            save_location = os.path.join(course_folder, f"{course_code}_{course_name.replace(' ', '_')}_{i+1}.pdf")
+                            jobs.append((file_id, save_location))
+                        else:
+                            print(f"❌ Failed to extract file ID from: {link}")
+
+                    # Download all papers concurrently over one pooled session
+                    print_download_summary(download_files(jobs))
+                    return
+                else:
+                    print("⚠ No question papers found at this URL. Trying next format...")
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            question_links = [link['href'] for link in soup.find_all('a', href=True) if 'drive.google.com' in link['href']]
-            
-            if question_links:
-                for i, link in enumerate(question_links):
-                    file_id = extract_file_id(link)
-                    if file_id:
-                        save_location = os.path.join(course_folder, f"{course_code}_{course_name.replace(' ', '_')}_{i+1}.pdf")
-                        download_google_drive_file(file_id, save_location)
-                    else:
-                        print(f"❌ Failed to extract file ID from: {link}")
-                return
-            else:
-                print("⚠ No question papers found at this URL. Trying next format...")
+        # A stale cached format gets one fresh probe of every format
+        if not use_cache or not forget_course_format(course_code):
+            break
 
     print("❌ Failed to load webpage with all URL formats. Please check the course details.")
 
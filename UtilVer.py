@@ -1,23 +1,27 @@
-import json
 import os
 import glob
-import requests
-import google.generativeai as genai
-from bs4 import BeautifulSoup
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.common.by import By
+import sys
 import time
-import fitz  # PyMuPDF for PDF text extraction
-import matplotlib.pyplot as plt
-from collections import Counter
-from gensim import corpora, models
-import spacy
-
-nlp = spacy.load("en_core_web_sm")
+from collections import deque
+from pyq_downloader import fetch_with_retries, download_files, print_download_summary
+from course_resolver import resolve_course_urls, remember_course_format, forget_course_format
+import text_cache
+import pdf_text
+import text_cleaner
+from text_cleaner import clean_texts
+from topic_matcher import count_topics
+from topic_model import course_topic_model, train_model
+from browser_pool import fetch_timetable_text
+import timetable_cache
+from timetable_index import index_for, format_record
+from user_store import users, UserExistsError
+from chart_renderer import chart_file
+from prep_pipeline import Stage, run_pipeline, timed
+import tracing
+
+# Heavy dependencies (selenium, PyMuPDF, spaCy, gensim, matplotlib, Gemini) are
+# imported inside the features that use them, so the menu comes up instantly.
 
 # ----------------------------------------
 #  ✅ GEMINI AI CONFIGURATION FUNCTION
@@ -32,6 +36,8 @@ def configure_gemini(api_key=GOOGLE_API_KEY):
         return None
 
     try:
+        import google.generativeai as genai
+
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel("gemini-2.0-flash")
         convo = model.start_chat()
@@ -46,8 +52,14 @@ def configure_gemini(api_key=GOOGLE_API_KEY):
         print(f"❌ Gemini AI initialization failed: {e}")
         return None
 
-# ✅ Call function correctly
-convo = configure_gemini(GOOGLE_API_KEY)
+_convo = None
+
+def get_gemini_convo():
+    """Returns the Gemini chat session, starting it on first use."""
+    global _convo
+    if _convo is None:
+        _convo = configure_gemini(GOOGLE_API_KEY)
+    return _convo
 
 
 def chat_with_gemini(convo):
@@ -153,28 +165,15 @@ COURSE_TOPICS = {
 }
 
 
-USER_DATA_FILE = "user_data.json"
-KTU_NOTES_URL = "https://examtimetable.ktunotes.in/"
-
-def load_all_users():
-    if os.path.exists(USER_DATA_FILE) and os.path.getsize(USER_DATA_FILE) > 0:
-        with open(USER_DATA_FILE, "r") as file:
-            return json.load(file)
-    return {}
-
-def save_all_users(user_data):
-    with open(USER_DATA_FILE, "w") as file:
-        json.dump(user_data, file, indent=4)
+LOGIN_PAGE_SIZE = 20  # Users listed per page on the login screen
 
 def register_user():
     print("\n🔹 Register a new user 🔹")
 
-    all_users = load_all_users()
-
     # Ensure user ID is a unique numeric value
     while True:
         user_id = input("Enter a unique numeric User ID: ").strip()
-        if user_id.isdigit() and user_id not in all_users:
+        if user_id.isdigit() and not users.exists(user_id):
             break
         print("❌ User ID must be a number and unique. Try again.")
 
@@ -183,41 +182,51 @@ def register_user():
     branch = input("Enter your branch (e.g., CSE, ECE, MECH): ").strip().upper()
     scheme = input("Enter your academic scheme (e.g., 2019, 2021): ").strip()
 
-    # Store user data in the required format
-    all_users[user_id] = {
-        "name": name,
-        "semester": semester,
-        "branch": branch,
-        "scheme": scheme
-    }
-    save_all_users(all_users)
+    try:
+        user_details = users.add(user_id, name, semester, branch, scheme)
+    except UserExistsError as e:  # Taken by another session since the check above
+        print(f"❌ {e}")
+        return None, None
 
     print(f"\n✅ User '{name}' registered successfully!\n")
-    return user_id, all_users[user_id]
+    return user_id, user_details
 
 
 def login_user():
-    users = load_all_users()
-    if not users:
+    total = users.count()
+    if not total:
         print("❌ No registered users found. Please register first.")
         return None, None
-    
+
     print("\n🔹 Select your User ID 🔹")
-    user_list = list(users.keys())
-    for i, user in enumerate(user_list, start=1):
-        print(f"{i}. {user} ({users[user]['name']})")
-    
+    offset = 0
     while True:
-        try:
-            choice = int(input("\nEnter the number corresponding to your User ID: "))
-            if 1 <= choice <= len(user_list):
-                user_id = user_list[choice - 1]
-                print(f"\n👤 Welcome back, {users[user_id]['name']}!")
-                return user_id, users[user_id]
-            else:
-                print("❌ Invalid selection. Try again.")
-        except ValueError:
-            print("❌ Please enter a valid number.")
+        page = users.list(limit=LOGIN_PAGE_SIZE, offset=offset)
+        for i, (user_id, details) in enumerate(page, start=1):
+            print(f"{i}. {user_id} ({details['name']})")
+        more = offset + len(page) < total
+        if more:
+            print("n. Next page")
+        print("i. Enter User ID directly")
+
+        choice = input("\nEnter your choice: ").strip().lower()
+        if choice == "n" and more:
+            offset += LOGIN_PAGE_SIZE
+            continue
+        if choice == "i":
+            user_id = input("Enter your User ID: ").strip()
+            user_details = users.get(user_id)
+            if not user_details:
+                print("❌ No user with that ID. Try again.")
+                continue
+        elif choice.isdigit() and 1 <= int(choice) <= len(page):
+            user_id, user_details = page[int(choice) - 1]
+        else:
+            print("❌ Invalid selection. Try again.")
+            continue
+
+        print(f"\n👤 Welcome back, {user_details['name']}!")
+        return user_id, user_details
 
 def initialize_user():
     while True:
@@ -240,58 +249,56 @@ def initialize_user():
             print("\n❌ Invalid choice. Please try again.")
 
 
-def fetch_timetable(user_data):
-    options = Options()
-    options.add_argument("--headless")
-    service = Service(r"C:\\Users\\Kurian Tony Aloor\\Downloads\\chromedriver-win64\\chromedriver-win64\\chromedriver.exe")
-    driver = webdriver.Chrome(service=service, options=options)
-    
+@tracing.traced()
+def fetch_timetable(user_data, refresh=False):
+    """
+    Returns the user's timetable text. Scrapes are cached per (semester, branch, scheme)
+    and shared with the GUI; refresh=True drops the cached copy first.
+    """
     semester = user_data.get("semester")
     branch = user_data.get("branch")  # Fix incorrect key usage
     scheme = user_data.get("scheme", "2019")  # Default scheme to 2019
 
-    try:
-        driver.get(KTU_NOTES_URL)
-        time.sleep(3)
-        
-        Select(driver.find_element(By.ID, "sem")).select_by_visible_text(semester)
-        time.sleep(2)
-        Select(driver.find_element(By.ID, "branch")).select_by_visible_text(branch)
-        time.sleep(2)
-        Select(driver.find_element(By.ID, "scheme")).select_by_visible_text(scheme)
-        time.sleep(2)
-        
-        try:
-            timetable_element = driver.find_element(By.CLASS_NAME, "table-responsive")
-            timetable_text = timetable_element.text.strip()
-            if not timetable_text:
-                print("❌ Timetable is empty.")
-                return ""
-            return timetable_text
-        except:
-            print("❌ Timetable not found on the page.")
-            return ""
-    
-    except Exception as e:
-        print(f"Error fetching timetable: {e}")
-        return ""
-    
-    finally:
+    if refresh:
+        timetable_cache.invalidate(semester, branch, scheme)
+    timetable_text = timetable_cache.get_timetable(
+        semester, branch, scheme, lambda: fetch_timetable_text(semester, branch, scheme))
+    if timetable_text:
         print(timetable_text)
-        driver.quit()
+    return timetable_text
 
-def get_exam_date(user_data):
+def find_exam_dates(user_data, course):
+    """ Timetable records matching a course name or code, or None when no timetable could be fetched. """
+    timetable = fetch_timetable(user_data)
+    if not timetable:
+        return None
+    return index_for(timetable).lookup(course)
+
+def resolve_exam_course(user_data, course):
+    """ (records, exact) for a course name or code, or None when no timetable could be fetched. """
     timetable = fetch_timetable(user_data)
     if not timetable:
+        return None
+    return index_for(timetable).resolve(course)
+
+def course_label(record):
+    """ "CST204 – DATABASE MANAGEMENT SYSTEMS", for asking the user to confirm a fuzzy match. """
+    return f"{record.course_code} – {record.course_name}" if record.course_code else record.course_name
+
+def get_exam_date(user_data):
+    course = input("Enter the course name to find its exam date: ").strip()
+    matches = find_exam_dates(user_data, course)
+    if matches is None:
         print("❌ Failed to retrieve exam timetable.")
         return
+    if not matches:
+        print(f"❌ Course '{course}' not found in the timetable.")
+        return
+    for record in matches:
+        print(f"\n📅 Exam Date for {course}: {format_record(record)}")
 
-    course = input("Enter the course name to find its exam date: ").strip()
-    for line in timetable.split("\n"):
-        if course.lower() in line.lower():
-            print(f"\n📅 Exam Date for {course}: {line}")
-            return
-    print(f"❌ Course '{course}' not found in the timetable.")
+# Site hosting the question-paper pages (swapped for a local server by the benchmarks)
+KTUNOTES_BASE_URL = "https://www.ktunotes.in"
 
 def format_course_url(course_code, course_name, format_type=1):
     """
@@ -304,136 +311,232 @@ def format_course_url(course_code, course_name, format_type=1):
     course_name_formatted = course_name.replace(" ", "-").lower()
     
     if format_type == 1:
-        return f"https://www.ktunotes.in/ktu-{course_code.lower()}-{course_name_formatted}-solved-question-papers/"
+        return f"{KTUNOTES_BASE_URL}/ktu-{course_code.lower()}-{course_name_formatted}-solved-question-papers/"
     
     elif format_type == 2:
         course_code_alpha = re.match(r'[A-Za-z]+', course_code).group()
         course_code_numeric = re.search(r'\d+', course_code).group()
-        return f"https://www.ktunotes.in/ktu-{course_code_alpha.lower()}-{course_code_numeric}-{course_name_formatted}-solved-question-papers/"
+        return f"{KTUNOTES_BASE_URL}/ktu-{course_code_alpha.lower()}-{course_code_numeric}-{course_name_formatted}-solved-question-papers/"
     
     elif format_type == 3:
-        return f"https://www.ktunotes.in/ktu-{course_name_formatted}-question-papers-{course_code.lower()}/"
+        return f"{KTUNOTES_BASE_URL}/ktu-{course_name_formatted}-question-papers-{course_code.lower()}/"
 
 def extract_file_id(drive_url):
     """Extract the Google Drive file ID from the URL."""
     match = re.search(r'(file/d/|id=)([\w-]+)', drive_url)
     return match.group(2) if match else None
 
-def download_google_drive_file(file_id, save_path):
-    """Download a file from Google Drive using its file ID."""
-    url = f"https://drive.google.com/uc?export=download&id={file_id}"
-    response = requests.get(url, stream=True)
-    
-    if response.status_code == 200:
-        with open(save_path, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        print(f"✅ File downloaded: {save_path}")
-    else:
-        print(f"❌ Failed to download file. Status code: {response.status_code}")
-
-def download_question_papers(course_code, course_name, download_folder):
+@tracing.traced()
+def download_question_papers(course_code, course_name, download_folder, progress=None):
     """
     Fetch and download question papers for the given course code and name.
-    Tries 3 different URL formats.
+    Tries 3 different URL formats, probed concurrently. The format that works
+    is remembered per course code so later runs go straight to it.
+    Papers are downloaded concurrently; progress(done, total, result) is called per file.
+    Returns the download results, or [] when no papers were found.
     """
-    for format_type in range(1, 4):
-        url = format_course_url(course_code, course_name, format_type)
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            print(f"✅ Fetching papers from: {url}")
-            course_folder = os.path.join(download_folder, f"{course_code}_{course_name.replace(' ', '_')}")
-            os.makedirs(course_folder, exist_ok=True)
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            question_links = [link['href'] for link in soup.find_all('a', href=True) if 'drive.google.com' in link['href']]
-            
-            if question_links:
-                for i, link in enumerate(question_links):
-                    file_id = extract_file_id(link)
-                    if file_id:
-                        save_location = os.path.join(course_folder, f"{course_code}_{course_name.replace(' ', '_')}_{i+1}.pdf")
-                        download_google_drive_file(file_id, save_location)
-                    else:
-                        print(f"❌ Failed to extract file ID from: {link}")
-                return
-            else:
-                print("⚠ No question papers found at this URL. Trying next format...")
+    from bs4 import BeautifulSoup
+
+    for use_cache in (True, False):
+        for format_type, url in resolve_course_urls(course_code, course_name, format_course_url, use_cache):
+            response = fetch_with_retries(url)
+
+            if response.status_code == 200:
+                print(f"✅ Fetching papers from: {url}")
+                course_folder = os.path.join(download_folder, f"{course_code}_{course_name.replace(' ', '_')}")
+                os.makedirs(course_folder, exist_ok=True)
+
+                soup = BeautifulSoup(response.text, 'html.parser')
+                question_links = [link['href'] for link in soup.find_all('a', href=True) if 'drive.google.com' in link['href']]
+
+                if question_links:
+                    remember_course_format(course_code, format_type)
+                    jobs = []
+                    for i, link in enumerate(question_links):
+                        file_id = extract_file_id(link)
+                        if file_id:
+                            save_location = os.path.join(course_folder, f"{course_code}_{course_name.replace(' ', '_')}_{i+1}.pdf")
+                            jobs.append((file_id, save_location))
+                        else:
+                            print(f"❌ Failed to extract file ID from: {link}")
+
+                    # Download all papers concurrently over one pooled session
+                    results = download_files(jobs, progress=progress)
+                    print_download_summary(results)
+                    return results
+                else:
+                    print("⚠ No question papers found at this URL. Trying next format...")
+
+        # A stale cached format gets one fresh probe of every format
+        if not use_cache or not forget_course_format(course_code):
+            break
 
     print("❌ Failed to load webpage with all URL formats. Please check the course details.")
+    return []
 
 def select_pdfs():
     """ Opens a file dialog for users to select multiple PDF files. """
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()
     root.attributes('-topmost', True)
     file_paths = filedialog.askopenfilenames(title="Select Question Paper PDFs", filetypes=[("PDF Files", "*.pdf")])
     return list(file_paths)
 
-def extract_text_from_pdfs(pdf_files):
-    """ Extracts and cleans text from selected PDFs. """
-    combined_text = ""
+# Topic analysis needs plain text only, so any engine will do (KTU_PDF_BACKEND picks one)
+PDF_BACKEND = pdf_text.DEFAULT_BACKEND
+# Bump whenever extraction or cleaning changes so stale cached text is not reused
+EXTRACTOR_VERSION = f"{PDF_BACKEND}-spacy-1"
+
+# Uncached pages are cleaned in batches this large, so a corpus of small PDFs still
+# reaches text_cleaner's multi-process nlp.pipe threshold
+CLEAN_BATCH_PAGES = text_cleaner.MULTIPROCESS_MIN_DOCS
+
+def _clean_batch(batch):
+    """ Cleans the raw pages of several PDFs in one spaCy run and caches each PDF's share. """
+    texts = [text for _, _, raw_texts in batch for text in raw_texts]
+    cleaned = clean_texts(texts, CUSTOM_STOPWORDS) if texts else []
+    start = 0
+    for entry, key, raw_texts in batch:
+        entry[1] = cleaned[start:start + len(raw_texts)]
+        start += len(raw_texts)
+        text_cache.put_pages(key, entry[1])
+    batch.clear()
+
+def iter_pages_per_pdf(pdf_files, workers=None):
+    """
+    Yields (pdf_path, [cleaned page text]) per PDF, in input order, reusing cached
+    text for unchanged files. New PDFs are read across a process pool, and their pages
+    are cleaned CLEAN_BATCH_PAGES at a time across PDFs, so memory stays bounded while
+    spaCy still gets batches big enough for its worker processes.
+    """
+    pdf_files = list(dict.fromkeys(pdf_files))
+    keys, cached_pages = {}, {}
     for pdf_path in pdf_files:
-        with fitz.open(pdf_path) as doc:
-            for page in doc:
-                text = page.get_text("text")
-                text = clean_text(text)
-                combined_text += text + " "
-    return combined_text
+        keys[pdf_path] = text_cache.cache_key(pdf_path, EXTRACTOR_VERSION, CUSTOM_STOPWORDS)
+        pages = text_cache.get_pages(keys[pdf_path])
+        if pages is not None:
+            cached_pages[pdf_path] = pages
+    tracing.count("text_cache.hit", len(cached_pages))
+    tracing.count("text_cache.miss", len(pdf_files) - len(cached_pages))
+
+    raw_pages = pdf_text.iter_pdf_pages([pdf_path for pdf_path in pdf_files if pdf_path not in cached_pages],
+                                       workers, PDF_BACKEND)
+    next_page = next(raw_pages, None)
+    pending = deque()           # [pdf_path, cleaned pages or None until its batch is cleaned]
+    batch, batch_pages = [], 0  # (pending entry, cache key, raw page texts)
+    for pdf_path in pdf_files:
+        if pdf_path in cached_pages:
+            pending.append([pdf_path, cached_pages.pop(pdf_path)])
+        else:
+            texts = []
+            with tracing.span("pdf_parse", "pdf", backend=PDF_BACKEND, pdf=os.path.basename(pdf_path)):
+                while next_page is not None and next_page[0] == pdf_path:
+                    texts.append(next_page[1])
+                    next_page = next(raw_pages, None)
+            tracing.count("pdf.pages", len(texts))
+
+            entry = [pdf_path, None]
+            pending.append(entry)
+            batch.append((entry, keys[pdf_path], texts))
+            batch_pages += len(texts)
+            if batch_pages >= CLEAN_BATCH_PAGES:
+                _clean_batch(batch)
+                batch_pages = 0
+
+        while pending and pending[0][1] is not None:
+            yield tuple(pending.popleft())
+
+    _clean_batch(batch)
+    while pending:
+        yield tuple(pending.popleft())
+
+def iter_corpus_pages(pdf_files, workers=None):
+    """ Every cleaned page of every PDF, streamed; for consumers that do not need the whole corpus at once. """
+    for _, pages in iter_pages_per_pdf(pdf_files, workers):
+        yield from pages
+
+
+@tracing.traced()
+def extract_pages_per_pdf(pdf_files, progress=None, workers=None):
+    """
+    Returns {pdf_path: [cleaned page text]}, reusing cached text for unchanged files.
+    progress(done, total, message) is called as each PDF is finished.
+    """
+    pages_per_pdf = {}
+    total = len(set(pdf_files))
+    for done, (pdf_path, pages) in enumerate(iter_pages_per_pdf(pdf_files, workers), start=1):
+        pages_per_pdf[pdf_path] = pages
+        if progress:
+            progress(done, total, f"Extracted {os.path.basename(pdf_path)}")
+    return pages_per_pdf
+
+def paper_texts(pages_per_pdf):
+    """ One cleaned text per paper, for per-paper topic modelling. """
+    return [" ".join(pages) for pages in pages_per_pdf.values()]
+
+def combine_pages(pages_per_pdf):
+    """ Joins every page of every paper into one corpus string. """
+    return " ".join(text for pages in pages_per_pdf.values() for text in pages)
+
+def extract_text_from_pdfs(pdf_files, workers=None):
+    """ Extracts and cleans text from selected PDFs, reusing cached text for unchanged files. """
+    return " ".join(iter_corpus_pages(pdf_files, workers))
 
 def clean_text(text):
     """ Uses spaCy for better text processing (removes stopwords, junk, and unwanted characters). """
-    text = text.lower().strip()
-    text = re.sub(r'\d+', '', text)  # Remove numbers
-    text = re.sub(r'\s+', ' ', text)  # Remove extra spaces
-    doc = nlp(text)  # Process text with spaCy NLP
-    words = [token.text for token in doc if not token.is_stop and not token.is_punct and token.text not in CUSTOM_STOPWORDS]
-    return " ".join(words)
+    return text_cleaner.clean_text(text, CUSTOM_STOPWORDS)
 
+@tracing.traced()
 def analyze_topics(text, topic_list):
-    """ Counts occurrences of predefined topics with flexible matching. """
-    topic_counts = Counter()
-    for topic in topic_list:
-        pattern = r'\b' + re.escape(topic.split()[0]) + r'\w*\b'  # Match base form of topics
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            topic_counts[topic] = len(matches)
+    """ Counts occurrences of predefined topics (full phrases, plurals and stopword-free forms) in one pass. """
+    stopwords = frozenset(text_cleaner.stop_words()) | CUSTOM_STOPWORDS
+    topic_counts = count_topics(text, topic_list, stopwords)
     return dict(sorted(topic_counts.items(), key=lambda x: x[1], reverse=True))
 
-def extract_topics_with_ai(text, num_topics=5):
-    """ Uses AI-based topic modeling (LDA) to discover key topics dynamically. """
-    words = [[token.text for token in nlp(text) if not token.is_stop and not token.is_punct]]
-    dictionary = corpora.Dictionary(words)
-    corpus = [dictionary.doc2bow(word_list) for word_list in words]
-    
-    if len(dictionary) < 10:  # Skip LDA if too few words
+@tracing.traced("lda_topics", "nlp")
+def extract_topics_with_ai(papers, num_topics=5, course_code=None):
+    """
+    Uses AI-based topic modeling (LDA) to discover key topics dynamically.
+    Each paper is one document. With a course code the model is saved per course
+    and later papers are folded in with online updates instead of retraining.
+    """
+    if isinstance(papers, str):
+        papers = [papers]
+
+    if course_code:
+        lda_model = course_topic_model(course_code, papers, num_topics)
+    else:
+        trained = train_model([text.split() for text in papers if text.strip()], num_topics)
+        lda_model = trained[0] if trained else None
+
+    if lda_model is None:  # Skip LDA if too few words
         print("⚠ Not enough content for AI topic modeling.")
-        return
+        return []
 
-    lda_model = models.LdaModel(corpus, num_topics=num_topics, id2word=dictionary, passes=10)
     topics = lda_model.print_topics(num_words=5)
 
     print("\n🔍 **AI-Extracted Key Topics:**")
     for idx, topic in enumerate(topics):
         print(f"🔹 Topic {idx+1}: {topic[1]}")
+    return [topic[1] for topic in topics]
 
-def plot_topic_frequencies(topic_frequencies):
-    """ Plots a bar chart of the most frequently occurring topics. """
+@tracing.traced()
+def plot_topic_frequencies(topic_frequencies, fmt="png"):
+    """
+    Renders a bar chart of the most frequently occurring topics off-screen and returns
+    the image path. Identical data reuses the cached image instead of re-rendering.
+    """
     if not topic_frequencies:
         print("⚠ No topics found to visualize.")
-        return
-    
-    topics, frequencies = zip(*topic_frequencies.items())
-    
-    plt.figure(figsize=(10, 5))
-    plt.barh(topics[::-1], frequencies[::-1], color="skyblue")
-    plt.xlabel("Frequency")
-    plt.ylabel("Topics")
-    plt.title("Most Frequently Asked Topics in Question Papers")
-    plt.grid(axis="x", linestyle="--", alpha=0.7)
-    plt.show()
+        return None
 
+    path = chart_file(topic_frequencies, fmt)
+    print(f"📈 Topic chart saved to: {path}")
+    return path
+
+@tracing.traced()
 def qpan(course_code):
     """ Question Paper Analysis for the Selected Course """
     print("\n📂 Select Question Paper PDFs...")
@@ -444,7 +547,8 @@ def qpan(course_code):
         return
 
     print("\n📥 Extracting text from PDFs...")
-    extracted_text = extract_text_from_pdfs(pdf_files)
+    pages_per_pdf = extract_pages_per_pdf(pdf_files)
+    extracted_text = combine_pages(pages_per_pdf)
     
     if not extracted_text.strip():
         print("❌ No text extracted. Please check the PDF files.")
@@ -469,8 +573,9 @@ def qpan(course_code):
         print("⚠ No predefined topics found in the PDFs.")
 
     print("\n🤖 Running AI-based topic analysis...")
-    extract_topics_with_ai(extracted_text)
+    extract_topics_with_ai(paper_texts(pages_per_pdf), course_code=course_code)
 
+@tracing.traced()
 def exam_prep_mode(user_data):
     """Exam Preparation Mode - Fetch timetable, display exam date, download & analyze question papers."""
     timetable = fetch_timetable(user_data)
@@ -481,19 +586,23 @@ def exam_prep_mode(user_data):
     course = input("Enter the course name you're preparing for: ").strip()
     
     # Display exam date
-    exam_date_found = False
-    for line in timetable.split("\n"):
-        if course.lower() in line.lower():
-            print(f"\n📅 Exam Date for {course}: {line}")
-            exam_date_found = True
-            break
-
-    if not exam_date_found:
+    matches, exact = index_for(timetable).resolve(course)
+    if not matches:
         print(f"❌ Course '{course}' not found in the timetable.")
         return
+    record = matches[0]
+    if not exact:
+        # A typo-tolerant hit may be a different course, so it is only used once confirmed
+        answer = input(f"🔎 Did you mean {course_label(record)}? (y/n): ").strip().lower()
+        if answer == "y":
+            course = record.course_name
+        else:
+            record = None
+    if record:
+        print(f"\n📅 Exam Date for {course}: {format_record(record)}")
     
-    # Automatically get course code from user_data if available
-    course_code = input("Enter the course code (e.g., MAT206): ").strip().upper()
+    # Take the course code from the timetable when it lists one
+    course_code = (record and record.course_code) or input("Enter the course code (e.g., MAT206): ").strip().upper()
     download_folder = r"C:\Users\Kurian Tony Aloor\Downloads\KTU"
     
     # Step 1: Download question papers
@@ -513,10 +622,12 @@ def exam_prep_mode(user_data):
     # Step 3: Analyze downloaded question papers using the correct topic dataset
     analyze_downloaded_papers(downloaded_pdfs, course_code)
 
+@tracing.traced()
 def analyze_downloaded_papers(pdf_files, course_code):
     """Analyze downloaded PDFs automatically without user selection."""
     print("\n📥 Extracting text from PDFs...")
-    extracted_text = extract_text_from_pdfs(pdf_files)
+    pages_per_pdf = extract_pages_per_pdf(pdf_files)
+    extracted_text = combine_pages(pages_per_pdf)
     
     if not extracted_text.strip():
         print("❌ No text extracted. Please check the PDF files.")
@@ -541,15 +652,108 @@ def analyze_downloaded_papers(pdf_files, course_code):
         print("⚠ No predefined topics found in the PDFs.")
 
     print("\n🤖 Running AI-based topic analysis...")
-    extract_topics_with_ai(extracted_text)
+    extract_topics_with_ai(paper_texts(pages_per_pdf), course_code=course_code)
+# --- SEMESTER PREP MODE ---
+
+def semester_courses(user_data):
+    """ (timetable record, course code) for every distinct course with a code in the user's timetable. """
+    timetable = fetch_timetable(user_data)
+    if not timetable:
+        return None
+    courses = {}
+    for record in index_for(timetable).records:
+        if record.course_code and record.course_code not in courses:
+            courses[record.course_code] = record
+    return list(courses.values())
+
+def _download_stage(course):
+    record = course["record"]
+    folder = course["download_folder"]
+    results = download_question_papers(record.course_code, record.course_name, folder)
+    course["pdfs"] = [result["path"] for result in results if result["ok"]]
+    if not course["pdfs"]:
+        raise RuntimeError("no question papers could be downloaded")
+    return course
+
+def _extract_stage(course):
+    course["pages"] = extract_pages_per_pdf(course["pdfs"])
+    return course
+
+def _analyze_stage(course):
+    code = course["record"].course_code
+    topic_list = COURSE_TOPICS.get(code, [])
+    if topic_list:
+        course["topics"] = analyze_topics(combine_pages(course["pages"]), topic_list)
+        course["chart"] = chart_file(course["topics"])
+    course["ai_topics"] = extract_topics_with_ai(paper_texts(course["pages"]), course_code=code)
+    del course["pages"]  # Done with the text; keep the report light
+    return course
+
+def format_semester_report(results, elapsed):
+    """ One section per course: exam date, papers, top topics, AI topics, chart. """
+    lines = ["📚 SEMESTER PREP REPORT", "=" * 40]
+    for result in results:
+        record = result.item["record"]
+        lines.append(f"\n{format_record(record)}")
+        if result.error:
+            lines.append(f"   ❌ {result.failed_stage} failed: {result.error}")
+            continue
+        course = result.value
+        lines.append(f"   📥 {len(course['pdfs'])} question papers")
+        top = [f"{topic} ({count})" for topic, count in list(course.get("topics", {}).items())[:5] if count]
+        if "topics" not in course:
+            lines.append("   ⚠ No predefined topics for this course")
+        elif not top:
+            lines.append("   ⚠ None of the predefined topics appear in the papers")
+        else:
+            lines.append(f"   📊 Top topics: {', '.join(top)}")
+            lines.append(f"   📈 Chart: {course['chart']}")
+        for idx, topic in enumerate(course.get("ai_topics") or [], start=1):
+            lines.append(f"   🔹 AI topic {idx}: {topic}")
+
+    stage_time = sum(sum(r.value.get("timings", {}).values()) for r in results if r.value)
+    lines.append(f"\n⏱ {len(results)} courses in {elapsed:.1f}s ({stage_time:.1f}s of stage work overlapped)")
+    return "\n".join(lines)
+
+@tracing.traced()
+def semester_prep_mode(user_data, download_folder):
+    """
+    Exam prep for every course in the user's timetable at once. Downloading, text
+    extraction and topic analysis run as overlapping stages joined by bounded queues,
+    so one course's papers download while another's are parsed or analysed.
+    Prints one consolidated report and saves it in the download folder.
+    """
+    courses = semester_courses(user_data)
+    if courses is None:
+        print("❌ Failed to retrieve exam timetable.")
+        return None
+    if not courses:
+        print("❌ No course codes found in the timetable.")
+        return None
+
+    print(f"\n📚 Preparing {len(courses)} courses: {', '.join(r.course_code for r in courses)}")
+    start = time.perf_counter()
+    stages = [Stage("download", timed(_download_stage), workers=2),
+              Stage("extract", timed(_extract_stage)),
+              Stage("analyze", timed(_analyze_stage))]
+    results = run_pipeline(
+        [{"record": record, "download_folder": download_folder} for record in courses], stages,
+        on_result=lambda r: print(f"{'❌' if r.error else '✅'} Finished {r.item['record'].course_code}"))
+
+    report = format_semester_report(results, time.perf_counter() - start)
+    print("\n" + report)
+    os.makedirs(download_folder, exist_ok=True)
+    report_path = os.path.join(download_folder, "semester_report.txt")
+    with open(report_path, "w", encoding="utf-8") as file:
+        file.write(report + "\n")
+    print(f"\n📝 Report saved to: {report_path}")
+    return results
+
 # --- MAIN MENU FUNCTION ---
 
 def main():
     """Main function to run the KTU Exam & Resources Portal."""
     
-    GOOGLE_API_KEY = "YOUR_GEMINI_API_KEY"  # <-- Replace with your actual API key
-    convo = None  # Only initialize Gemini when required
-    
     user_id, user_details = initialize_user()
     if not user_details:
         print("❌ No user logged in. Exiting...")
@@ -562,8 +766,9 @@ def main():
         print("3️⃣ Download Previous Year Question Papers")
         print("4️⃣ Analyze Question Papers")
         print("5️⃣ Exam Preparation Mode 🎯")
-        print("6️⃣ AI Assistant Chat 🤖")
-        print("7️⃣ Exit")
+        print("6️⃣ Semester Preparation Mode 📚")
+        print("7️⃣ AI Assistant Chat 🤖")
+        print("8️⃣ Exit")
 
         choice = input("\nEnter your choice: ").strip()
 
@@ -581,10 +786,13 @@ def main():
         elif choice == "5":
             exam_prep_mode(user_details)
         elif choice == "6":
-            if convo is None:
-                convo = configure_gemini(GOOGLE_API_KEY)  # Initialize Gemini only when needed
-            chat_with_gemini(convo)
+            download_folder = r"C:\Users\Kurian Tony Aloor\Downloads\KTU"
+            semester_prep_mode(user_details, download_folder)
         elif choice == "7":
+            convo = get_gemini_convo()  # Initialize Gemini only when needed
+            if convo:
+                chat_with_gemini(convo)
+        elif choice == "8":
             print("👋 Exiting... Goodbye!")
             break
         else:
@@ -592,4 +800,5 @@ def main():
 
 
 if __name__ == "__main__":
+    sys.argv[1:] = tracing.enable_from_argv(sys.argv[1:])  # --trace[=file.json]
     main()
\ No newline at end of file
@@ -1,20 +1,33 @@
 import requests
 from bs4 import BeautifulSoup
-import fitz  # PyMuPDF for PDF parsing
 import os
 import re
+import sys
+
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_cache import cached_parse
+from timetable_store import TimetableStore
+import pdf_text
+import tracing
+
+# Line-oriented plain text is all the month filter needs; PyMuPDF is the fastest engine for it
+PDF_BACKEND = "pymupdf"
 
 # URL of the KTU timetable page
 KTU_URL = "https://ktu.edu.in/exam/timetable"
 
 # Step 1: Fetch the webpage and extract PDF titles and links
-def get_pdf_details():
-    response = requests.get(KTU_URL)
-    if response.status_code != 200:
-        print("Failed to fetch the page")
-        return []
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
+@tracing.traced("fetch_listing", "network")
+def fetch_listing(url, headers):
+    """Conditional GET used by the HTTP cache; a 304 is passed through."""
+    response = requests.get(url, headers=headers, timeout=10)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response.status_code, response.text, response.headers
+
+def parse_pdf_listing(html):
+    soup = BeautifulSoup(html, 'html.parser')
     pdf_details = []
     
     # Find all anchor tags with PDFs
@@ -28,6 +41,14 @@ def get_pdf_details():
     
     return pdf_details
 
+def get_pdf_details():
+    """Returns the PDF list from the timetable page, cached on disk and revalidated after the TTL."""
+    try:
+        return cached_parse(KTU_URL, fetch_listing, parse_pdf_listing, namespace="mainSp")
+    except requests.RequestException:
+        print("Failed to fetch the page")
+        return []
+
 # Step 2: Parse PDF titles to extract metadata
 def parse_pdf_title(title):
     pattern = re.compile(r"(?P<course>\w+\.\w+) S(?P<semester>\d+) .* (?P<month>\w+) (?P<year>\d{4}) \((?P<scheme>\d{4}) Scheme\)")
@@ -37,43 +58,79 @@ def parse_pdf_title(title):
         return match.groupdict()
     return {}
 
-# Step 3: Download and extract exam timetable for a specific course
-def extract_exam_timetable(course_code):
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+@tracing.traced("parse_timetable_pdf", "pdf")
+def extract_dates_from_pdf(pdf_bytes):
+    """Returns the lines of an in-memory timetable PDF that mention a month."""
+    exam_dates = []
+    pages = pdf_text.extract_pages(pdf_bytes, backend=PDF_BACKEND)
+    tracing.count("pdf.pages", len(pages))
+    for text in pages:
+        # Extract dates (custom logic based on PDF format)
+        for line in text.split("\n"):
+            if any(month in line for month in MONTHS):
+                exam_dates.append(line.strip())
+    return exam_dates
+
+def title_matches(course_code, title):
+    # Case-insensitive, so the backends can key their caches by the upper-cased code
+    return course_code.upper() in title.upper()
+
+@tracing.traced("fetch_pdf", "network")
+def fetch_pdf(url, headers=None):
+    """Conditional GET for a timetable PDF; a 304 is passed through."""
+    response = requests.get(url, headers=headers or {}, timeout=30)
+    if response.status_code != 304:
+        response.raise_for_status()
+    tracing.count("network.bytes", len(response.content))
+    return response.status_code, response.content, response.headers
+
+# Warm local copy of every timetable PDF's dates, filled by a background refresher
+store = TimetableStore("mainSp", get_pdf_details, fetch_pdf, extract_dates_from_pdf, title_matches)
+
+# Step 3: Download and extract exam timetables for one or more courses
+@tracing.traced()
+def extract_exam_timetables(course_codes, use_store=True):
+    """
+    Returns {course_code: date lines} for several courses at once. Each relevant
+    PDF is downloaded and parsed once, however many courses it covers.
+    """
+    course_codes = list(dict.fromkeys(course_codes))  # Drop duplicates, keep order
+    
+    if use_store:
+        stored = store.lookup_many(course_codes)
+        if stored is not None:
+            return {code: [line for lines in stored[code] for line in lines] for code in course_codes}
+    
+    exam_dates = {code: [] for code in course_codes}
     pdf_details = get_pdf_details()
     
     if not pdf_details:
         print("No PDFs found on the page.")
-        return []
+        return exam_dates
     
-    exam_dates = []
-    
-    for i, pdf in enumerate(pdf_details):
-        if course_code not in pdf["title"]:
-            continue  # Skip PDFs that don't match the course
-        
-        pdf_path = f"timetable_{i}.pdf"
+    for pdf in pdf_details:
+        matching = [code for code in course_codes if title_matches(code, pdf["title"])]
+        if not matching:
+            continue  # Skip PDFs that don't match any course
         
-        # Download PDF
-        pdf_response = requests.get(pdf["url"])
-        with open(pdf_path, "wb") as pdf_file:
-            pdf_file.write(pdf_response.content)
-        
-        # Parse PDF
-        with fitz.open(pdf_path) as doc:
-            for page in doc:
-                text = page.get_text()
-                
-                # Extract dates (custom logic based on PDF format)
-                for line in text.split("\n"):
-                    if any(month in line for month in ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]):
-                        exam_dates.append(line.strip())
-        
-        # Clean up PDF
-        os.remove(pdf_path)
+        # Download and parse the PDF in memory, once for every course it covers
+        try:
+            lines = extract_dates_from_pdf(fetch_pdf(pdf["url"])[1])
+        except requests.RequestException as e:
+            print(f"Error downloading {pdf['url']}: {e}")
+            continue
+        for code in matching:
+            exam_dates[code].extend(lines)
     
     return exam_dates
 
+def extract_exam_timetable(course_code, use_store=True):
+    return extract_exam_timetables([course_code], use_store)[course_code]
+
 if __name__ == "__main__":
+    sys.argv[1:] = tracing.enable_from_argv(sys.argv[1:])  # --trace[=file.json]
     course_code = input("Enter the course code (e.g., MBA S4): ")
     exam_schedule = extract_exam_timetable(course_code)
     if exam_schedule:
@@ -0,0 +1,290 @@
+"""
+Offline end-to-end benchmark: timetable scraping, question-paper downloads and paper
+analysis against a local stand-in for ktu.edu.in, ktunotes.in and Google Drive.
+
+    python benchmarks/bench_end_to_end.py [--courses 5] [--papers 4] [--pages 6]
+                                          [--timetables 20] [--repeats 5] [--output results.json]
+
+A threaded HTTP server serves a synthetic timetable listing, timetable PDFs, ktunotes
+course pages and a Drive-style download endpoint (with Range support); all PDFs are
+generated at start-up. Caches go to a throw-away KTU_CACHE_DIR, so runs never touch
+the live sites or the real caches. Latency percentiles and throughput per scenario
+are printed as JSON, and written to --output when given, for regression tracking.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The utilities are imported in the functions, after main() has pointed KTU_CACHE_DIR at
+# a temporary folder. Spawned parser workers re-import this module, so nothing at module
+# level may create folders or pull in the utilities.
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+# ---------------------------------------------------------------- synthetic site
+
+def build_site(courses, papers, pages, timetables):
+    """All routes of the fake sites: {path: (content_type, body)} plus the course list."""
+    from bench_pdf_backends import make_pdf
+    import UtilVer
+
+    codes = list(UtilVer.COURSE_TOPICS)
+    course_list = []
+    for n in range(courses):
+        code = codes[n % len(codes)] if n < len(codes) else f"BEN{100 + n}"
+        course_list.append((code, f"Bench Course {n}"))
+
+    routes = {}
+
+    # Timetable listing: every PDF names a few courses in its title
+    links = []
+    for t in range(timetables):
+        covered = [code for i, (code, _) in enumerate(course_list) if i % 3 == t % 3]
+        covered = covered or [course_list[t % courses][0]]
+        lines = ["APJ ABDUL KALAM TECHNOLOGICAL UNIVERSITY", f"Time Table {t}"]
+        for day, code in enumerate(covered, start=1):
+            lines.append(f"{day} {(day % 28) + 1:02d} {MONTHS[t % 12]} 2024 FN A {code} EXAM {t}")
+        routes[f"/pdf/timetable_{t}.pdf"] = ("application/pdf", make_pdf(lines, pages=2))
+        links.append(f'<a href="{{base}}/pdf/timetable_{t}.pdf">B.Tech Exam {" ".join(covered)} {t}</a>')
+    routes["/exam/timetable"] = ("text/html", "<html><body>" + "\n".join(links) + "</body></html>")
+
+    # ktunotes course pages (URL format 1 only, so the resolver has to probe) and Drive files
+    for code, name in course_list:
+        topics = UtilVer.COURSE_TOPICS.get(code) or ["sample topic", "another topic"]
+        drive_links = []
+        for p in range(papers):
+            file_id = f"{code}_{p}"
+            lines = [f"{code} {name} question paper {p}"]
+            lines += [f"Q{q}. Explain {topics[(p + q) % len(topics)]} with an example." for q in range(40)]
+            routes[f"/drive/{file_id}"] = ("application/pdf", make_pdf(lines, pages))
+            drive_links.append(f'<a href="https://drive.google.com/file/d/{file_id}/view">Paper {p}</a>')
+        path = UtilVer.format_course_url(code, name, 1).replace(UtilVer.KTUNOTES_BASE_URL, "")
+        routes[path] = ("text/html", "<html><body>" + "\n".join(drive_links) + "</body></html>")
+
+    return routes, course_list
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    routes = {}
+    base = ""
+
+    def _resolve(self):
+        path = self.path
+        match = re.match(r"/uc\?export=download&id=([\w-]+)", path)
+        if match:
+            path = f"/drive/{match.group(1)}"
+        return self.routes.get(path)
+
+    def _send(self, with_body):
+        route = self._resolve()
+        if route is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        content_type, body = route
+        if isinstance(body, str):
+            body = body.replace("{base}", self.base).encode("utf-8")
+
+        status, start = 200, 0
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if match and content_type == "application/pdf":
+            start = int(match.group(1))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body) - start))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body[start:])
+
+    def do_GET(self):
+        self._send(with_body=True)
+
+    def do_HEAD(self):
+        self._send(with_body=False)
+
+    def log_message(self, format, *args):
+        pass  # Keep the benchmark output clean
+
+
+def start_site(routes):
+    import KTUTT
+    import pyq_downloader
+    import UtilVer
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    SiteHandler.routes = routes
+    SiteHandler.base = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Point the scrapers at the local server
+    KTUTT.KTU_URL = f"{SiteHandler.base}/exam/timetable"
+    UtilVer.KTUNOTES_BASE_URL = SiteHandler.base
+    pyq_downloader.DRIVE_DOWNLOAD_URL = f"{SiteHandler.base}/uc?export=download&id={{file_id}}"
+    return server
+
+
+# ---------------------------------------------------------------- measurement
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of a non-empty list."""
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def measure(name, repeats, run, items_per_run, unit, setup=None):
+    """Times run() `repeats` times (output silenced); setup() runs untimed before each."""
+    print(f"⏱ {name}...", file=sys.stderr)
+    latencies, errors = [], []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run()
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        latencies.append(time.perf_counter() - start)
+
+    summary = {"runs": len(latencies), "errors": len(errors), "unit": unit, "items_per_run": items_per_run}
+    if errors:
+        summary["first_error"] = errors[0]
+    if latencies:
+        summary.update({
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p90_ms": round(percentile(latencies, 0.90) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "min_ms": round(min(latencies) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+            "throughput_per_s": round(items_per_run * len(latencies) / sum(latencies), 2),
+        })
+    return name, summary
+
+
+def run(cache_dir, courses=5, papers=4, pages=6, timetables=20, repeats=5, workers=None):
+    import http_cache
+    import KTUTT
+    import text_cache
+    import UtilVer
+
+    routes, course_list = build_site(courses, papers, pages, timetables)
+    server = start_site(routes)
+    download_root = os.path.join(cache_dir, "downloads")
+    counter = iter(range(1_000_000))
+
+    def scrape_all():
+        for code, _ in course_list:
+            KTUTT.extract_exam_timetable(code, workers=workers, use_store=False)
+
+    def store_lookup_all():
+        for code, _ in course_list:
+            KTUTT.extract_exam_timetable(code, use_store=True)
+
+    def download_all():
+        folder = os.path.join(download_root, str(next(counter)))  # Fresh folder: nothing to skip
+        for code, name in course_list:
+            UtilVer.download_question_papers(code, name, folder)
+
+    def paper_folder(code, name):
+        return os.path.join(download_root, "0", f"{code}_{name.replace(' ', '_')}")
+
+    def clear_analysis_caches():
+        # Cold means no cached page text and no persisted LDA model to update
+        text_cache.evict(0)
+        shutil.rmtree(os.path.join(cache_dir, "lda"), ignore_errors=True)
+
+    def analyze_all():
+        for code, name in course_list:
+            folder = paper_folder(code, name)
+            pdfs = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".pdf"))
+            UtilVer.analyze_downloaded_papers(pdfs, code)
+
+    # Untimed warm-up, so the timed scrapes do not include starting the parser pool
+    with contextlib.redirect_stdout(io.StringIO()):
+        scrape_all()
+
+    scenarios = [
+        measure("get_pdf_details (cold)", repeats, KTUTT.get_pdf_details, 1, "listings",
+                setup=lambda: http_cache.invalidate()),
+        measure("get_pdf_details (cached)", repeats, KTUTT.get_pdf_details, 1, "listings"),
+        measure("extract_exam_timetable (scrape)", repeats, scrape_all, len(course_list), "courses"),
+        measure("download_question_papers", repeats, download_all, len(course_list) * papers, "files"),
+        measure("analyze_downloaded_papers (cold text cache)", repeats, analyze_all,
+                len(course_list) * papers * pages, "pages", setup=clear_analysis_caches),
+        measure("analyze_downloaded_papers (warm text cache)", repeats, analyze_all,
+                len(course_list) * papers * pages, "pages"),
+    ]
+    KTUTT.store.track(code for code, _ in course_list)
+    with contextlib.redirect_stdout(io.StringIO()):
+        KTUTT.store.refresh()
+    scenarios.append(measure("extract_exam_timetable (store)", repeats, store_lookup_all, len(course_list), "courses"))
+
+    server.shutdown()
+    return {
+        "config": {"courses": courses, "papers_per_course": papers, "pages_per_paper": pages,
+                   "timetable_pdfs": timetables, "repeats": repeats, "workers": workers},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        "scenarios": dict(scenarios),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=5)
+    parser.add_argument("--papers", type=int, default=4, help="question papers per course")
+    parser.add_argument("--pages", type=int, default=6, help="pages per question paper")
+    parser.add_argument("--timetables", type=int, default=20, help="timetable PDFs in the listing")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="timetable PDFs parsed at once when scraping (default: CPU count, 1 = in-process)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Every cache the utilities keep goes to a temporary folder; set before they are imported
+    cache_dir = tempfile.mkdtemp(prefix="ktu_bench_")
+    os.environ["KTU_CACHE_DIR"] = cache_dir  # Inherited by the spawned workers
+    try:
+        report = run(cache_dir, args.courses, args.papers, args.pages, args.timetables, args.repeats,
+                     args.workers)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
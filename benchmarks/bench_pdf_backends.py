@@ -0,0 +1,81 @@
+"""
+PDF engine benchmark: pages per second of every pdf_text backend, plain and layout mode.
+
+    python benchmarks/bench_pdf_backends.py [pages] [repeats] [extra.pdf ...]
+
+The fixture PDF is generated from fixtures/timetable_page.txt, so no binary file is
+checked in; extra PDFs (e.g. downloaded question papers) are benchmarked as well.
+The "dates" column counts dates date_extractor finds in the first page, a quick
+check that the engine kept the rows intact.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pdf_text  # noqa: E402
+from date_extractor import extract_dates  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "timetable_page.txt")
+
+
+def make_pdf(lines, pages):
+    """Minimal multi-page PDF (Helvetica, one text line per row) built without any PDF library."""
+    def escape(line):
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    content = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({escape(line)}) Tj T*" for line in lines) + " ET"
+    content = content.encode("latin-1", "replace")
+
+    page_ids = [4 + 2 * n for n in range(pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id in page_ids:
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {page_id + 1} 0 R "
+                       "/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def bench(name, source, backend, layout, repeats):
+    try:
+        count = pdf_text.page_count(source, backend)
+        seconds = min(timeit.repeat(lambda: pdf_text.extract_pages(source, backend=backend, layout=layout),
+                                    number=1, repeat=repeats))
+        first_page = pdf_text.extract_pages(source, 0, 1, backend=backend, layout=layout)
+    except ImportError as e:
+        print(f"{name:>24} {backend:>10} {'layout' if layout else 'plain':>6}: skipped ({e})")
+        return
+    dates = len(extract_dates(first_page[0])) if first_page else 0
+    print(f"{name:>24} {backend:>10} {'layout' if layout else 'plain':>6}: "
+          f"{count / seconds:8.0f} pages/s ({seconds * 1000:7.1f} ms for {count} pages), {dates} dates")
+
+
+def run(pages=50, repeats=3, extra_pdfs=()):
+    with open(FIXTURE, "r") as file:
+        lines = file.read().splitlines()
+    sources = [("timetable fixture", make_pdf(lines, pages))]
+    sources += [(os.path.basename(path), path) for path in extra_pdfs]
+
+    for name, source in sources:
+        for backend in pdf_text.BACKENDS:
+            for layout in (False, True):
+                bench(name, source, backend, layout, repeats)
+
+
+if __name__ == "__main__":
+    numbers = [int(arg) for arg in sys.argv[1:3] if arg.isdigit()]
+    run(*numbers, extra_pdfs=[arg for arg in sys.argv[1:] if arg.lower().endswith(".pdf")])
@@ -0,0 +1,58 @@
+"""
+Start-up benchmark: import latency of UtilVer per menu path, each in a fresh interpreter.
+
+    python benchmarks/bench_startup.py [runs]
+
+Every path imports UtilVer and then only what that menu option loads on first
+use, so a regression that drags a heavy import back to module level shows up
+in the "menu" row.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Menu path -> statements that pull in the dependencies that option needs
+MENU_PATHS = {
+    "menu": "",
+    "timetable": "from selenium import webdriver",
+    "download papers": "from bs4 import BeautifulSoup",
+    "analyze papers": "import fitz; UtilVer.text_cleaner.get_nlp(); import gensim; import matplotlib.pyplot",
+    "ai assistant": "import google.generativeai",
+}
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import UtilVer
+{loads}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(loads, runs):
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", SNIPPET.format(loads=loads)],
+                                cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            return None, error
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings, None
+
+
+def run(runs=5):
+    print(f"{'menu path':>16} | {'median':>9} | {'min':>9}")
+    for path, loads in MENU_PATHS.items():
+        timings, error = measure(loads, runs)
+        if timings is None:
+            print(f"{path:>16} | unavailable: {error}")
+            continue
+        print(f"{path:>16} | {statistics.median(timings) * 1000:7.1f}ms | {min(timings) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,204 @@
+import atexit
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import tracing
+
+KTU_NOTES_URL = "https://examtimetable.ktunotes.in/"
+CHROMEDRIVER_PATH = os.environ.get(
+    "CHROMEDRIVER_PATH",
+    r"C:\\Users\\Kurian Tony Aloor\\Downloads\\chromedriver-win64\\chromedriver-win64\\chromedriver.exe"
+)
+POOL_SIZE = int(os.environ.get("KTU_BROWSER_POOL_SIZE", "2"))
+WAIT_TIMEOUT = 20  # Upper bound only; waits return as soon as the page is ready
+
+# Optional endpoint that serves the rendered table without a browser, with
+# {semester}, {branch} and {scheme} placeholders. When unset or failing, the
+# browser path is used.
+TIMETABLE_DATA_URL = os.environ.get("KTU_TIMETABLE_DATA_URL")
+
+
+class BrowserPool:
+    """A fixed number of warm headless Chrome sessions shared between callers."""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = queue.LifoQueue()  # Most recently used session first
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.add_argument("--headless")
+        service = Service(CHROMEDRIVER_PATH) if os.path.exists(CHROMEDRIVER_PATH) else Service()
+        return webdriver.Chrome(service=service, options=options)
+
+    def acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self._new_driver()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+            # Pool exhausted: wait for a session to come back (or a broken one to free a slot)
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    @staticmethod
+    def _alive(driver):
+        """Whether the browser session still answers commands."""
+        from selenium.common.exceptions import WebDriverException
+
+        try:
+            driver.title
+            return True
+        except WebDriverException:
+            return False
+
+    def release(self, driver, broken=False):
+        if broken:
+            with self._lock:
+                self._created -= 1
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def session(self):
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except TimeoutException:
+            raise  # The page was slow, the browser is fine
+        except WebDriverException:
+            # Page-level errors (missing element, stale reference ...) leave the session
+            # usable; only a crashed or disconnected browser is not put back
+            broken = not self._alive(driver)
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._created -= 1
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+pool = BrowserPool()
+atexit.register(pool.close)
+
+
+@tracing.traced("timetable_http", "network")
+def fetch_timetable_http(semester, branch, scheme, table_class="table-responsive"):
+    """Fetches the timetable without rendering, if a data URL is configured. Returns None otherwise."""
+    if not TIMETABLE_DATA_URL:
+        return None
+
+    import requests
+    from bs4 import BeautifulSoup
+
+    url = TIMETABLE_DATA_URL.format(semester=semester, branch=branch, scheme=scheme)
+    try:
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"⚠ HTTP timetable fetch failed, falling back to the browser: {e}")
+        return None
+
+    table = BeautifulSoup(response.text, "html.parser").select_one("." + ".".join(table_class.split()))
+    if table is None:
+        return None
+    # One line per table row, like the rendered element's .text
+    rows = table.find_all("tr")
+    if rows:
+        lines = [" ".join(cell.get_text(" ", strip=True) for cell in row.find_all(["th", "td"])) for row in rows]
+    else:
+        lines = [line.strip() for line in table.get_text("\n").split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+@tracing.traced("selenium_scrape", "network")
+def scrape_timetable(driver, semester, branch, scheme, table_class="table-responsive"):
+    """
+    Selects semester, branch and scheme, waiting on page state instead of fixed sleeps.
+    Returns "" when the site does not list one of the choices.
+    """
+    from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import Select, WebDriverWait
+
+    # Dropdowns are re-rendered as options load, so stale references are retried too
+    wait = WebDriverWait(driver, WAIT_TIMEOUT, ignored_exceptions=(StaleElementReferenceException,))
+    driver.get(KTU_NOTES_URL)
+
+    for element_id, value in (("sem", semester), ("branch", branch), ("scheme", scheme)):
+        # Each dropdown is filled in after the previous choice: wait until it has real options
+        wait.until(lambda d: len(Select(d.find_element(By.ID, element_id)).options) > 1)
+        try:
+            Select(wait.until(EC.element_to_be_clickable((By.ID, element_id)))).select_by_visible_text(value)
+        except NoSuchElementException:
+            print(f"❌ {value} is not listed on the timetable site.")
+            return ""
+
+    table_selector = (By.CSS_SELECTOR, "." + ".".join(table_class.split()))
+    wait.until(EC.visibility_of_element_located(table_selector))
+    wait.until(lambda d: d.find_element(*table_selector).text.strip())
+    return driver.find_element(*table_selector).text.strip()
+
+
+def fetch_timetable_text(semester, branch, scheme, table_class="table-responsive"):
+    """
+    Returns the timetable text for a semester/branch/scheme, or "" if it can't be found.
+    Tries the HTTP-only path first, then a warm browser from the pool.
+    """
+    text = fetch_timetable_http(semester, branch, scheme, table_class)
+    if text:
+        return text
+
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+
+    try:
+        with pool.session() as driver:
+            return scrape_timetable(driver, semester, branch, scheme, table_class)
+    except TimeoutException:
+        print("❌ Timetable not found on the page.")
+    except WebDriverException as e:
+        print(f"Error fetching timetable: {e}")
+    except Exception as e:  # Missing selenium/Chrome, driver start-up failures ...
+        print(f"Error fetching timetable: {e}")
+    return ""
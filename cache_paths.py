@@ -0,0 +1,11 @@
+import os
+
+# Root folder for every on-disk cache kept by the utilities, shared by the CLI and backends
+CACHE_DIR = os.environ.get("KTU_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ktu_cache"))
+
+
+def cache_path(*parts):
+    """Returns a path inside the cache folder, creating its parent directories."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
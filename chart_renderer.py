@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+
+from cache_paths import cache_path
+import tracing
+
+# Bump when the chart layout changes so cached images are re-rendered
+CHART_VERSION = 1
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+DEFAULT_TITLE = "Most Frequently Asked Topics in Question Papers"
+# Rendered charts kept on disk (KTU_CHART_CACHE_MAX); the least recently used go first
+MAX_CACHED_CHARTS = int(os.environ.get("KTU_CHART_CACHE_MAX", "256"))
+
+_lock = threading.Lock()
+_cached_count = None  # Files in the chart folder, counted once and then tracked
+
+
+def chart_key(topic_frequencies, fmt="png", title=DEFAULT_TITLE):
+    """Hash of the data (in display order), format, title and chart version."""
+    payload = json.dumps([list(topic_frequencies.items()), fmt, title, CHART_VERSION], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _render(topic_frequencies, fmt, title, dpi):
+    # Figure + Agg canvas directly: no pyplot, no GUI backend, no shared global figure state
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from io import BytesIO
+
+    topics, frequencies = zip(*topic_frequencies.items())
+    figure = Figure(figsize=(10, 5), dpi=dpi)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.barh(topics[::-1], frequencies[::-1], color="skyblue")
+    axes.set_xlabel("Frequency")
+    axes.set_ylabel("Topics")
+    axes.set_title(title)
+    axes.grid(axis="x", linestyle="--", alpha=0.7)
+    figure.tight_layout()
+
+    buffer = BytesIO()
+    figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def chart_file(topic_frequencies, fmt="png", title=DEFAULT_TITLE, dpi=100):
+    """
+    Path of the rendered bar chart for {topic: count}, rendering it only when the same
+    data has not been drawn before. Returns None when there is nothing to plot.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    if not topic_frequencies:
+        return None
+
+    path = cache_path("charts", f"{chart_key(topic_frequencies, fmt, title)}.{fmt}")
+    if os.path.exists(path):
+        tracing.count("chart_cache.hit")
+        try:
+            os.utime(path)  # The modification time doubles as the last-used time
+            return path
+        except FileNotFoundError:
+            pass  # Evicted meanwhile; render it again
+
+    with _lock:  # Matplotlib's text layout is not thread-safe
+        if not os.path.exists(path):
+            tracing.count("chart_cache.miss")
+            with tracing.span("matplotlib_render", "render", format=fmt):
+                image = _render(topic_frequencies, fmt, title, dpi)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(image)
+            os.replace(tmp_path, path)
+            _evict_if_full()
+    return path
+
+
+def _evict_if_full():
+    """Drops the least recently used charts once the folder holds more than MAX_CACHED_CHARTS. Call with _lock held."""
+    global _cached_count
+    folder = os.path.dirname(cache_path("charts", "_"))
+    if _cached_count is None:
+        _cached_count = len(os.listdir(folder))
+    else:
+        _cached_count += 1
+    if _cached_count <= MAX_CACHED_CHARTS:
+        return
+
+    entries = []
+    for name in os.listdir(folder):
+        try:
+            entries.append((os.path.getmtime(os.path.join(folder, name)), name))
+        except OSError:
+            continue
+    entries.sort()
+    for _, name in entries[:max(len(entries) - MAX_CACHED_CHARTS, 0)]:
+        try:
+            os.remove(os.path.join(folder, name))
+        except OSError:
+            pass
+    _cached_count = min(len(entries), MAX_CACHED_CHARTS)
+
+
+def render_topic_chart(topic_frequencies, fmt="png", title=DEFAULT_TITLE, dpi=100):
+    """The chart as PNG/SVG bytes (see chart_file), or None when there is nothing to plot."""
+    for _ in range(2):
+        path = chart_file(topic_frequencies, fmt, title, dpi)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            continue  # Evicted between the lookup and the read
+    return _render(topic_frequencies, fmt, title, dpi)
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from cache_paths import cache_path
+from pyq_downloader import get_session
+
+URL_FORMATS = (1, 2, 3)
+PROBE_TIMEOUT = 10
+
+_cache_lock = threading.Lock()
+
+
+def _cache_file():
+    return cache_path("course_urls.json")
+
+
+def load_resolver_cache():
+    """Returns the {course_code: format_type} map saved by earlier runs."""
+    path = _cache_file()
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def _write_json_atomic(path, data):
+    """Writes JSON through a temporary file private to this process and thread, then swaps it in."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, indent=4)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def remember_course_format(course_code, format_type):
+    """Stores the URL format that worked for a course code."""
+    with _cache_lock:
+        cache = load_resolver_cache()
+        if cache.get(course_code.upper()) == format_type:
+            return
+        cache[course_code.upper()] = format_type
+        _write_json_atomic(_cache_file(), cache)
+
+
+def forget_course_format(course_code):
+    """Drops a cached format, e.g. when its page no longer lists any papers. Returns True if one was dropped."""
+    with _cache_lock:
+        cache = load_resolver_cache()
+        if cache.pop(course_code.upper(), None) is None:
+            return False
+        _write_json_atomic(_cache_file(), cache)
+        return True
+
+
+def probe_url(url, session=None):
+    """Checks that a page exists using HEAD, falling back to a header-only GET."""
+    session = session or get_session()
+    try:
+        response = session.head(url, allow_redirects=True, timeout=PROBE_TIMEOUT)
+        if response.status_code in (405, 501):  # Server does not support HEAD
+            with session.get(url, stream=True, timeout=PROBE_TIMEOUT) as response:
+                return response.status_code == 200
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def resolve_course_urls(course_code, course_name, url_builder, use_cache=True):
+    """
+    Returns candidate (format_type, url) pairs for a course, best first.
+    A cached format is returned straight away; otherwise every format is
+    probed concurrently and the live ones are returned in format order.
+    """
+    cached = load_resolver_cache().get(course_code.upper()) if use_cache else None
+    if cached in URL_FORMATS:
+        return [(cached, url_builder(course_code, course_name, cached))]
+
+    candidates = [(format_type, url_builder(course_code, course_name, format_type)) for format_type in URL_FORMATS]
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+        alive = list(pool.map(lambda candidate: probe_url(candidate[1], session), candidates))
+
+    return [candidate for candidate, ok in zip(candidates, alive) if ok]
@@ -0,0 +1,110 @@
+import re
+from datetime import date, datetime
+
+from dateutil import parser  # Only used for the odd token the patterns can't place
+
+# Month names as they appear in KTU timetables (JAN, Jan, January, Sept. ...)
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+_MONTH = (r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?")
+_SUFFIX = r"(?:st|nd|rd|th)?"
+
+# One pass over the page: each alternative is one timetable date layout
+DATE_PATTERN = re.compile(
+    r"(?<![\w/.-])(?:"
+    # 2024-05-12
+    r"(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})"
+    # 12-05-2024, 12/05/24, 12.05.2024; no 2-digit year after dots, "3.5.10" is a clause number
+    r"|(?P<num_d>\d{1,2})(?P<sep>[-/.])(?P<num_m>\d{1,2})(?P=sep)(?P<num_y>\d{4}|(?<!\.)\d{2})"
+    # 12 May 2024, 12th MAY 2024, 12-May-2024, 12 May, 2024
+    rf"|(?P<dmy_d>\d{{1,2}}){_SUFFIX}[\s./-]*(?P<dmy_m>{_MONTH})\.?[\s,./-]*(?P<dmy_y>\d{{4}})"
+    # May 12, 2024, May 12th 2024
+    rf"|(?P<mdy_m>{_MONTH})\.?[\s-]*(?P<mdy_d>\d{{1,2}}){_SUFFIX},?[\s-]*(?P<mdy_y>\d{{4}})"
+    r")(?![\w/-])",
+    re.IGNORECASE
+)
+
+# Tokens with a digit, a four digit year and a month name that the patterns above
+# did not place (e.g. "12May2024") are handed to dateutil
+AMBIGUOUS_TOKEN = re.compile(rf"(?=\S*\d{{4}})(?=\S*(?:{_MONTH}))\S+", re.IGNORECASE)
+
+MIN_YEAR, MAX_YEAR = 1990, 2100
+
+
+def _build_date(day, month, year):
+    year = int(year)
+    if year < 100:
+        year += 2000
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        return None
+    try:
+        return date(year, month, int(day))
+    except ValueError:
+        return None
+
+
+def _month_number(name):
+    return MONTHS[name[:3].lower()]
+
+
+def _match_to_date(match):
+    groups = match.groupdict()
+    if groups["iso_y"]:
+        return _build_date(groups["iso_d"], int(groups["iso_m"]), groups["iso_y"])
+    if groups["num_d"]:
+        return _build_date(groups["num_d"], int(groups["num_m"]), groups["num_y"])
+    if groups["dmy_d"]:
+        return _build_date(groups["dmy_d"], _month_number(groups["dmy_m"]), groups["dmy_y"])
+    return _build_date(groups["mdy_d"], _month_number(groups["mdy_m"]), groups["mdy_y"])
+
+
+def _parse_ambiguous(token):
+    # Parsing against two different defaults exposes tokens missing a day, month or year
+    token = token.strip(",.;:()")
+    try:
+        first = parser.parse(token, dayfirst=True, default=datetime(2000, 1, 1))
+        second = parser.parse(token, dayfirst=True, default=datetime(2001, 2, 2))
+    except (ValueError, OverflowError):
+        return None
+    if first.date() != second.date():
+        return None
+    return first.date() if MIN_YEAR <= first.year <= MAX_YEAR else None
+
+
+def iter_dates(text):
+    """Yields every date in a page of timetable text, in reading order."""
+    last_end = 0
+    for match in DATE_PATTERN.finditer(text):
+        # Only the text between recognised dates needs the dateutil fallback
+        for token in AMBIGUOUS_TOKEN.finditer(text, last_end, match.start()):
+            parsed = _parse_ambiguous(token.group())
+            if parsed:
+                yield parsed
+        last_end = match.end()
+
+        parsed = _match_to_date(match)
+        if parsed:
+            yield parsed
+
+    for token in AMBIGUOUS_TOKEN.finditer(text, last_end):
+        parsed = _parse_ambiguous(token.group())
+        if parsed:
+            yield parsed
+
+
+def find_date(text):
+    """Returns (date, start, end) for the first pattern-matched date in the text, or None."""
+    for match in DATE_PATTERN.finditer(text):
+        parsed = _match_to_date(match)
+        if parsed:
+            return parsed, match.start(), match.end()
+    return None
+
+
+def extract_dates(text, date_format="%d %b %Y"):
+    """Returns the dates in a page of text formatted like the rest of KTUTT ("12 May 2024")."""
+    return [found.strftime(date_format) for found in iter_dates(text)]
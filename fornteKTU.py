@@ -1,16 +1,99 @@
 import sys
 import os
 import json
+import hashlib
+from collections import OrderedDict
 import requests
-import threading
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QPushButton,
                              QLabel, QFileDialog, QInputDialog, QMessageBox, 
                              QProgressBar, QHBoxLayout, QFrame, QTextBrowser, 
                              QScrollArea)
-from PyQt6.QtGui import QIcon, QPixmap
-from PyQt6.QtCore import Qt
-from test21 import (fetch_timetable, get_exam_date, download_question_papers,
-                     analyze_downloaded_papers, exam_prep_mode, initialize_user)
+from PyQt6.QtGui import QIcon, QPixmap, QImage, QTextDocument
+from PyQt6.QtCore import Qt, QUrl
+from UtilVer import (fetch_timetable, find_exam_dates, resolve_exam_course, course_label,
+                     download_question_papers, extract_pages_per_pdf, combine_pages, paper_texts,
+                     analyze_topics, extract_topics_with_ai, COURSE_TOPICS, initialize_user)
+from timetable_index import format_record
+from qt_tasks import TaskRunner
+from chart_renderer import render_topic_chart
+import tracing
+
+# ======================== BACKGROUND TASKS ============================
+# Each runs on a QThreadPool thread and talks to the window only through `task`
+# (progress, partial results, cancellation), never by touching widgets.
+
+def timetable_task(task, user_details):
+    task.progress(0, 0, "Fetching timetable...")
+    return fetch_timetable(user_details) or "Failed to fetch timetable!"
+
+def exam_date_task(task, user_details, course):
+    task.progress(0, 0, f"Looking up {course}...")
+    matches = find_exam_dates(user_details, course)
+    if matches is None:
+        return "❌ Failed to retrieve exam timetable."
+    if not matches:
+        return f"❌ Course '{course}' not found in the timetable."
+    return "\n".join(f"📅 Exam Date for {course}: {format_record(record)}" for record in matches)
+
+def download_task(task, course_code, course_name, download_folder):
+    task.progress(0, 0, "Finding question papers...")
+    results = download_question_papers(
+        course_code, course_name, download_folder,
+        progress=lambda done, total, result: task.progress(done, total, f"Downloaded {os.path.basename(result['path'])}"))
+    if not results:
+        return f"❌ No question papers found for {course_code}."
+    ok = sum(1 for result in results if result["ok"])
+    return f"📥 {ok}/{len(results)} question papers saved for {course_code}."
+
+def analysis_task(task, pdf_files, course_code):
+    task.progress(0, 0, "Extracting text from PDFs...")
+    pages_per_pdf = extract_pages_per_pdf(pdf_files, progress=task.progress)
+    extracted_text = combine_pages(pages_per_pdf)
+    if not extracted_text.strip():
+        return "❌ No text extracted. Please check the PDF files."
+
+    topic_list = COURSE_TOPICS.get(course_code, [])
+    if topic_list:
+        task.progress(0, 0, "Counting predefined topics...")
+        topic_frequencies = analyze_topics(extracted_text, topic_list)
+        lines = [f"✅ {topic}: {count} times" for topic, count in topic_frequencies.items()]
+        task.partial("📊 Most Frequently Asked Topics:\n" + ("\n".join(lines) or "⚠ None found in the PDFs."))
+        chart = render_topic_chart(topic_frequencies)  # PNG bytes, drawn off-screen
+        if chart:
+            task.partial(chart)
+    else:
+        task.partial(f"⚠ No predefined topics found for course code: {course_code}")
+
+    task.progress(0, 0, "Running AI topic analysis...")
+    topics = extract_topics_with_ai(paper_texts(pages_per_pdf), course_code=course_code)
+    if not topics:
+        return "⚠ Not enough content for AI topic modeling."
+    return "🔍 AI-Extracted Key Topics:\n" + "\n".join(f"🔹 Topic {i}: {topic}" for i, topic in enumerate(topics, start=1))
+
+def exam_prep_lookup_task(task, user_details, course):
+    """(timetable record, exact) for the course, or an error message to show."""
+    task.progress(0, 0, f"Looking up {course}...")
+    resolved = resolve_exam_course(user_details, course)
+    if resolved is None:
+        return "❌ Failed to retrieve exam timetable."
+    matches, exact = resolved
+    if not matches:
+        return f"❌ Course '{course}' not found in the timetable."
+    return matches[0], exact
+
+def exam_prep_task(task, record, course, download_folder):
+    task.partial(f"📅 Exam Date for {course}: {format_record(record)}")
+    if not record.course_code:
+        return "⚠ The timetable lists no course code for this course; use Download QPs instead."
+
+    results = download_question_papers(
+        record.course_code, course, download_folder,
+        progress=lambda done, total, result: task.progress(done, total, f"Downloaded {os.path.basename(result['path'])}"))
+    pdf_files = [result["path"] for result in results if result["ok"]]
+    if not pdf_files:
+        return "❌ No question papers could be downloaded for analysis."
+    task.partial(f"✅ {len(pdf_files)} question papers downloaded. Analyzing...")
+    return analysis_task(task, pdf_files, record.course_code)
 
 # ======================== LOGIN WINDOW ============================
 class LoginWindow(QWidget):
@@ -62,6 +145,9 @@ class LoginWindow(QWidget):
         self.main_window.show()
         self.close()
 
+# Charts kept as image resources of the display; older ones are released
+MAX_DISPLAYED_CHARTS = 20
+
 # ======================== MAIN DASHBOARD ============================
 class KTUExamUtility(QWidget):
     def __init__(self, user_id, user_details):
@@ -69,6 +155,8 @@ class KTUExamUtility(QWidget):
         self.user_id = user_id
         self.user_details = user_details
         self.dark_mode = False
+        self.tasks = TaskRunner(self)
+        self.charts = OrderedDict()  # chart:// URLs of the images in timetable_display, least recently used first
         self.initUI()
         self.load_demo_news()
 
@@ -101,6 +189,9 @@ class KTUExamUtility(QWidget):
         self.main_content = QVBoxLayout()
         self.timetable_display = QTextBrowser()
         self.progress_bar = QProgressBar()
+        self.status_label = QLabel("Ready")
+        self.cancel_btn = QPushButton("⏹ Cancel")
+        self.cancel_btn.setEnabled(False)
 
         self.timetable_display.setText("Latest Exam Timetable Will Appear Here...")
 
@@ -117,7 +208,11 @@ class KTUExamUtility(QWidget):
         self.main_content.addWidget(QLabel("KTU News Feed"))
         self.main_content.addWidget(self.news_scroll_area)
         self.main_content.addWidget(QLabel("Student Progress"))
-        self.main_content.addWidget(self.progress_bar)
+        self.progress_row = QHBoxLayout()
+        self.progress_row.addWidget(self.progress_bar, 1)
+        self.progress_row.addWidget(self.cancel_btn)
+        self.main_content.addLayout(self.progress_row)
+        self.main_content.addWidget(self.status_label)
 
         # Floating AI Assistant
         self.ai_button = QPushButton()
@@ -141,6 +236,7 @@ class KTUExamUtility(QWidget):
         self.dark_mode_btn.clicked.connect(self.toggle_dark_mode)
         self.exit_btn.clicked.connect(self.close)
         self.ai_button.clicked.connect(self.open_ai_assistant)
+        self.cancel_btn.clicked.connect(self.tasks.cancel_all)
 
     def toggle_dark_mode(self):
         if self.dark_mode:
@@ -150,12 +246,74 @@ class KTUExamUtility(QWidget):
             self.setStyleSheet("background-color: #1e1e1e; color: white;")
             self.dark_mode = True
 
+    def run_task(self, function, *args, title=None, on_result=None):
+        """
+        Runs function(task, *args) off the UI thread, streaming into the progress bar and
+        display. The return value goes to on_result (on the UI thread), else is shown.
+        """
+        if title is not None:
+            self.release_charts()
+            self.timetable_display.setText(title)
+        self.progress_bar.setRange(0, 0)  # Busy until the first real progress report
+        self.cancel_btn.setEnabled(True)
+        self.tasks.submit(function, *args,
+                          on_progress=self.show_progress, on_partial=self.show_partial,
+                          on_result=on_result or self.show_result, on_error=self.show_error,
+                          on_cancelled=lambda: self.status_label.setText("Cancelled"),
+                          on_finished=self.task_finished)
+
+    def show_progress(self, done, total, message):
+        self.progress_bar.setRange(0, total)  # total == 0 keeps the busy indicator
+        self.progress_bar.setValue(done)
+        if message:
+            self.status_label.setText(message)
+
+    def show_partial(self, value):
+        """Text is appended as-is; image bytes (rendered charts) are embedded inline."""
+        if isinstance(value, bytes):
+            url = QUrl(f"chart://{hashlib.sha1(value).hexdigest()}")
+            if url.toString() in self.charts:
+                self.charts.move_to_end(url.toString())  # Same chart again: reuse its image
+            else:
+                self.charts[url.toString()] = url
+                self.timetable_display.document().addResource(
+                    QTextDocument.ResourceType.ImageResource, url, QImage.fromData(value))
+                while len(self.charts) > MAX_DISPLAYED_CHARTS:
+                    self.release_chart(self.charts.popitem(last=False)[1])
+            self.timetable_display.append(f'<img src="{url.toString()}" width="600">')
+        else:
+            self.timetable_display.append(value)
+
+    def release_chart(self, url):
+        # A document cannot drop a resource, so its image is swapped for an empty one
+        self.timetable_display.document().addResource(QTextDocument.ResourceType.ImageResource, url, QImage())
+
+    def release_charts(self):
+        while self.charts:
+            self.release_chart(self.charts.popitem()[1])
+
+    def show_result(self, text):
+        if text:
+            self.timetable_display.append(text)
+        self.status_label.setText("Done")
+
+    def show_error(self, trace):
+        self.status_label.setText("Failed")
+        QMessageBox.critical(self, "Error", trace.strip().splitlines()[-1])
+
+    def task_finished(self):
+        if not self.tasks.busy():
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(1)
+            self.cancel_btn.setEnabled(False)
+
     def view_timetable(self):
-        timetable = fetch_timetable(self.user_details)
-        self.timetable_display.setText(timetable if timetable else "Failed to fetch timetable!")
+        self.run_task(timetable_task, self.user_details, title="")
 
     def get_exam_date(self):
-        get_exam_date(self.user_details)
+        course, ok = QInputDialog.getText(self, "Exam Date", "Enter the course name or code:")
+        if ok and course.strip():
+            self.run_task(exam_date_task, self.user_details, course.strip(), title="")
 
     def download_qp(self):
         course_code, ok = QInputDialog.getText(self, "Course Code", "Enter Course Code:")
@@ -163,17 +321,45 @@ class KTUExamUtility(QWidget):
             course_name, ok = QInputDialog.getText(self, "Course Name", "Enter Course Name:")
             if ok and course_name:
                 download_folder = QFileDialog.getExistingDirectory(self, "Select Download Folder")
-                threading.Thread(target=download_question_papers, args=(course_code, course_name, download_folder)).start()
+                if download_folder:
+                    self.run_task(download_task, course_code.strip().upper(), course_name.strip(),
+                                  download_folder, title=f"📥 Downloading question papers for {course_code}...")
 
     def analyze_qp(self):
         pdf_files, _ = QFileDialog.getOpenFileNames(self, "Select PDFs", "", "PDF Files (*.pdf)")
         if pdf_files:
             course_code, ok = QInputDialog.getText(self, "Course Code", "Enter Course Code:")
             if ok and course_code:
-                analyze_downloaded_papers(pdf_files, course_code)
+                self.run_task(analysis_task, pdf_files, course_code.strip().upper(),
+                              title=f"📊 Analyzing {len(pdf_files)} question papers...")
 
     def exam_prep_mode(self):
-        threading.Thread(target=exam_prep_mode, args=(self.user_details,)).start()
+        course, ok = QInputDialog.getText(self, "Exam Prep Mode", "Enter the course you're preparing for:")
+        if ok and course.strip():
+            download_folder = QFileDialog.getExistingDirectory(self, "Select Download Folder")
+            if download_folder:
+                self.run_task(exam_prep_lookup_task, self.user_details, course.strip(),
+                              title=f"🎯 Exam prep for {course.strip()}",
+                              on_result=lambda found: self.start_exam_prep(found, course.strip(), download_folder))
+
+    def start_exam_prep(self, found, course, download_folder):
+        """Second step of exam prep, on the UI thread: a fuzzy match is confirmed before downloading."""
+        if isinstance(found, str):
+            self.show_result(found)
+            return
+        record, exact = found
+        if not exact:
+            answer = QMessageBox.question(self, "Exam Prep Mode",
+                                          f"'{course}' is not an exact match.\nDid you mean {course_label(record)}?")
+            if answer != QMessageBox.StandardButton.Yes:
+                self.show_result(f"❌ Course '{course}' not confirmed; try its course code instead.")
+                return
+            course = record.course_name
+        self.run_task(exam_prep_task, record, course, download_folder)
+
+    def closeEvent(self, event):
+        self.tasks.cancel_all()  # Running tasks stop at their next progress report
+        super().closeEvent(event)
 
     def open_ai_assistant(self):
         QMessageBox.information(self, "AI Assistant", "Chat assistant will be implemented soon!")
@@ -189,7 +375,7 @@ class KTUExamUtility(QWidget):
             self.news_layout.addWidget(QLabel(post))
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    app = QApplication(tracing.enable_from_argv(sys.argv))  # --trace[=file.json]
     login_window = LoginWindow()
     login_window.show()
     sys.exit(app.exec())
@@ -1,21 +1,101 @@
-from flask import Flask, request, jsonify
+import os
+import sys
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from ktu_exam_scraper import extract_exam_timetable
+from KTUTT import extract_exam_timetable, extract_exam_timetables, store
+from http_cache import cache_stats
+from single_flight import SingleFlight
+import tracing
+from chart_renderer import FORMATS, render_topic_chart
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
 
+# Concurrent requests for the same course share one scrape; results are kept for 10 minutes
+schedule_flight = SingleFlight(ttl=int(os.environ.get("KTU_SCHEDULE_TTL", "600")))
+# Identical concurrent batches share one scrape too
+batch_flight = SingleFlight(ttl=0)
+# Upper bound on courses per batch request
+MAX_BATCH_COURSES = 100
+
 @app.route("/get_exam_schedule", methods=["POST"])
+@tracing.traced("POST /get_exam_schedule", "http")
 def get_exam_schedule():
-    data = request.get_json()
-    course_code = data.get("course_code")
+    data = request.get_json(silent=True) or {}
+    # KTU course codes are upper case in the timetable titles; one spelling, one cache entry
+    course_code = (data.get("course_code") or "").strip().upper()
     
     if not course_code:
         return jsonify({"error": "Course code is required"}), 400
     
-    exam_dates = extract_exam_timetable(course_code)
+    exam_dates = schedule_flight.do(course_code, extract_exam_timetable, course_code)
+    
+    return jsonify({"exam_dates": exam_dates})
+
+@app.route("/get_exam_schedules", methods=["POST"])
+@tracing.traced("POST /get_exam_schedules", "http")
+def get_exam_schedules():
+    """Batch lookup: {"course_codes": [...]} -> {"exam_dates": {course_code: [...]}}."""
+    data = request.get_json(silent=True) or {}
+    course_codes = data.get("course_codes")
+    
+    if not isinstance(course_codes, list) or not course_codes:
+        return jsonify({"error": "course_codes must be a non-empty list"}), 400
+    course_codes = list(dict.fromkeys(str(code).strip().upper() for code in course_codes if str(code).strip()))
+    if not course_codes or len(course_codes) > MAX_BATCH_COURSES:
+        return jsonify({"error": f"Between 1 and {MAX_BATCH_COURSES} course codes are required"}), 400
+    
+    # Serve what the per-course cache already has, scrape the rest in one pass
+    exam_dates, missing = {}, []
+    for code in course_codes:
+        found, dates = schedule_flight.peek(code)
+        if found:
+            exam_dates[code] = dates
+        else:
+            missing.append(code)
+    
+    if missing:
+        scraped = batch_flight.do(tuple(sorted(missing)), extract_exam_timetables, missing)
+        for code in missing:
+            exam_dates[code] = scraped[code]
+            schedule_flight.put(code, scraped[code])
     
     return jsonify({"exam_dates": exam_dates})
 
+@app.route("/topic_chart", methods=["POST"])
+@tracing.traced("POST /topic_chart", "http")
+def topic_chart():
+    """{"topic_frequencies": {topic: count}, "format": "png" | "svg"} -> the rendered bar chart."""
+    data = request.get_json(silent=True) or {}
+    frequencies = data.get("topic_frequencies")
+    fmt = data.get("format", "png")
+    
+    if not isinstance(frequencies, dict) or not frequencies or fmt not in FORMATS:
+        return jsonify({"error": "topic_frequencies must be a non-empty object and format png or svg"}), 400
+    try:
+        frequencies = {str(topic): float(count) for topic, count in frequencies.items()}
+    except (TypeError, ValueError):
+        return jsonify({"error": "Topic counts must be numbers"}), 400
+    
+    return Response(render_topic_chart(frequencies, fmt), mimetype=FORMATS[fmt])
+
+@app.route("/cache_stats", methods=["GET"])
+def get_cache_stats():
+    """Listing cache and schedule cache counters, to watch the hit ratio under load."""
+    return jsonify({"listing": cache_stats(), "schedules": schedule_flight.stats(),
+                    "store_last_refresh": store.last_refresh()})
+
+def serve(port=5000, threads=16):
+    """Serves with waitress when installed, otherwise Flask's threaded server without the debugger."""
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        app.run(host="0.0.0.0", port=port, threaded=True, debug=False)
+    else:
+        waitress_serve(app, host="0.0.0.0", port=port, threads=threads)
+
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
+    sys.argv[1:] = tracing.enable_from_argv(sys.argv[1:])  # --trace[=file.json]
+    # Keep the timetable store warm so requests are answered without scraping
+    store.start_refresher()
+    serve(port=int(os.environ.get("PORT", "5000")))
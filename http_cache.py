@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from cache_paths import cache_path
+import tracing
+
+# Seconds a cached page is trusted before it is revalidated with the server
+DEFAULT_TTL = int(os.environ.get("KTU_HTTP_CACHE_TTL", "900"))
+
+_memory = {}
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def cache_stats():
+    """Hit/miss counters since start-up: hits, revalidated (304), misses, stale, errors."""
+    with _lock:
+        stats = {name: _stats[name] for name in ("hits", "revalidated", "misses", "stale", "errors")}
+    lookups = stats["hits"] + stats["revalidated"] + stats["misses"] + stats["stale"]
+    stats["hit_ratio"] = round((stats["hits"] + stats["revalidated"]) / lookups, 3) if lookups else 0.0
+    return stats
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+    tracing.count(f"http_cache.{name}")
+
+
+def _entry_path(namespace, url):
+    key = hashlib.sha1(f"{namespace}:{url}".encode("utf-8")).hexdigest()
+    return cache_path("http", f"{key}.json")
+
+
+def _load_entry(namespace, url):
+    with _lock:
+        entry = _memory.get((namespace, url))
+    if entry:
+        return entry
+
+    path = _entry_path(namespace, url)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    with _lock:
+        _memory[(namespace, url)] = entry
+    return entry
+
+
+def _save_entry(namespace, url, entry):
+    with _lock:
+        _memory[(namespace, url)] = entry
+
+    path = _entry_path(namespace, url)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # The in-memory copy still serves this process
+
+
+def cached_parse(url, fetch, parse, namespace="default", ttl=DEFAULT_TTL):
+    """
+    Returns parse(body) for a URL, going to the network as little as possible.
+
+    fetch(url, headers) must return (status_code, body, response_headers) and raise
+    on network or HTTP errors other than 304. Within the TTL the cached parse
+    result is returned without a request; after it, the page is revalidated with
+    If-None-Match / If-Modified-Since and only re-parsed when it actually changed.
+    If the server can't be reached, the last good result is served instead.
+    """
+    entry = _load_entry(namespace, url)
+    if entry and time.time() - entry["fetched_at"] < ttl:
+        _count("hits")
+        return entry["data"]
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        status_code, body, response_headers = fetch(url, headers)
+    except Exception:
+        if entry:
+            _count("stale")
+            return entry["data"]
+        _count("errors")
+        raise
+
+    if status_code == 304 and entry:
+        _count("revalidated")
+        entry = dict(entry, fetched_at=time.time())
+        _save_entry(namespace, url, entry)
+        return entry["data"]
+
+    _count("misses")
+    data = parse(body)
+    _save_entry(namespace, url, {
+        "url": url,
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+        "data": data
+    })
+    return data
+
+
+def invalidate(url=None, namespace="default"):
+    """Forgets one cached URL, or every cached page when no URL is given."""
+    with _lock:
+        if url is None:
+            _memory.clear()
+        else:
+            _memory.pop((namespace, url), None)
+
+    if url is not None:
+        path = _entry_path(namespace, url)
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    folder = os.path.dirname(cache_path("http", "x"))
+    for name in os.listdir(folder):
+        if name.endswith(".json"):
+            os.remove(os.path.join(folder, name))
@@ -0,0 +1,189 @@
+import importlib
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple
+
+# Engine used when a call site does not pick one (KTU_PDF_BACKEND)
+DEFAULT_BACKEND = os.environ.get("KTU_PDF_BACKEND", "pymupdf")
+PAGES_PER_TASK = 8            # Pages parsed per worker task
+MULTIPROCESS_MIN_PAGES = 16   # Below this, starting worker processes costs more than it saves
+
+
+class Backend(NamedTuple):
+    """
+    A PDF text engine. `source` is a file path or the PDF's bytes.
+        page_count(source)                             -> int
+        pages(source, first_page, last_page, layout)   -> [text of each page in the range]
+    layout=True asks the engine to keep the page's visual lines and columns (words
+    placed at their horizontal position); the default is plain reading-order text only.
+
+    Worker processes receive the Backend itself, so its functions must be importable
+    module-level functions (not lambdas or closures) for spawn-started workers.
+    """
+    page_count: Callable
+    pages: Callable
+
+
+def _pymupdf_open(source):
+    try:
+        import pymupdf as fitz  # PyMuPDF >= 1.24; the `fitz` alias is deprecated there
+    except ImportError:
+        import fitz
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _pymupdf_page_count(source):
+    with _pymupdf_open(source) as doc:
+        return doc.page_count
+
+
+def _pymupdf_layout_text(page):
+    """
+    The page's words laid out on a character grid: words on the same visual line share
+    a row, and each starts at the column matching its x position, so columns line up.
+    """
+    words = page.get_text("words")  # (x0, y0, x1, y1, text, block, line, word)
+    if not words:
+        return ""
+    widths = sorted((x1 - x0) / len(text) for x0, _, x1, _, text, *_ in words if text)
+    char_width = widths[len(widths) // 2] or 1.0
+
+    rows = []  # [centre y, half height, words]
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        centre, half = (word[1] + word[3]) / 2, (word[3] - word[1]) / 2
+        if rows and abs(centre - rows[-1][0]) <= max(half, rows[-1][1]) / 2:
+            rows[-1][2].append(word)
+        else:
+            rows.append([centre, half, [word]])
+
+    lines = []
+    for _, _, row in rows:
+        line = ""
+        for x0, _, _, _, text, *_ in sorted(row, key=lambda w: w[0]):
+            column = int(x0 / char_width)
+            line += " " * max(column - len(line), 1 if line else 0) + text
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _pymupdf_pages(source, first_page, last_page, layout):
+    with _pymupdf_open(source) as doc:
+        last_page = min(last_page, doc.page_count)
+        if layout:
+            return [_pymupdf_layout_text(doc[number]) for number in range(first_page, last_page)]
+        return [doc[number].get_text("text") for number in range(first_page, last_page)]
+
+
+def _pdfplumber_open(source):
+    import pdfplumber
+    if isinstance(source, (bytes, bytearray)):
+        return pdfplumber.open(io.BytesIO(source))
+    return pdfplumber.open(source)
+
+
+def _pdfplumber_page_count(source):
+    with _pdfplumber_open(source) as doc:
+        return len(doc.pages)
+
+
+def _pdfplumber_pages(source, first_page, last_page, layout):
+    with _pdfplumber_open(source) as doc:
+        return [page.extract_text(layout=layout) or "" for page in doc.pages[first_page:last_page]]
+
+
+BACKENDS = {
+    "pymupdf": Backend(_pymupdf_page_count, _pymupdf_pages),
+    "pdfplumber": Backend(_pdfplumber_page_count, _pdfplumber_pages),
+}
+
+
+def register_backend(name, page_count, pages):
+    """Adds or replaces an engine in this process; see Backend for the expected signatures."""
+    BACKENDS[name] = Backend(page_count, pages)
+
+
+def get_backend(name=None):
+    """
+    A Backend by registered name, as "package.module:attribute" naming a Backend
+    (importable in any process), or a Backend passed through as-is.
+    """
+    if isinstance(name, Backend):
+        return name
+    name = name or DEFAULT_BACKEND
+    if name in BACKENDS:
+        return BACKENDS[name]
+    if ":" in name:
+        module, _, attribute = name.partition(":")
+        try:
+            return Backend(*getattr(importlib.import_module(module), attribute))
+        except (ImportError, AttributeError, TypeError) as e:
+            raise ValueError(f"Cannot load PDF backend {name!r}: {e}")
+    raise ValueError(f"Unknown PDF backend {name!r}; choose from {', '.join(BACKENDS)}")
+
+
+def page_count(source, backend=None):
+    return get_backend(backend).page_count(source)
+
+
+def extract_pages(source, first_page=0, last_page=None, backend=None, layout=False):
+    """Text of pages [first_page, last_page) of a PDF path or bytes, one string per page."""
+    engine = get_backend(backend)
+    if last_page is None:
+        last_page = engine.page_count(source)
+    return engine.pages(source, first_page, last_page, layout)
+
+
+def read_pages(task):
+    """Worker: raw text of one page range, task = (source, first_page, last_page, backend, layout)."""
+    source, first_page, last_page, backend, layout = task
+    return extract_pages(source, first_page, last_page, backend, layout)
+
+
+def _tasks(sources, backend, layout):
+    """Page-range tasks for every PDF, plus the total number of pages."""
+    backend = get_backend(backend)  # Resolved here, so workers never look up registered names
+    tasks, total_pages = [], 0
+    for source in sources:
+        count = page_count(source, backend)
+        total_pages += count
+        for first_page in range(0, count, PAGES_PER_TASK):
+            tasks.append((source, first_page, min(first_page + PAGES_PER_TASK, count), backend, layout))
+    return tasks, total_pages
+
+
+def iter_pdf_pages(pdf_files, workers=None, backend=None, layout=False):
+    """
+    Yields (pdf_path, raw page text) for every page of every PDF, in input order.
+    Page ranges are parsed across a pool of `workers` processes (defaults to the CPU
+    count, 1 parses in-process); at most two tasks per worker are in flight, so
+    memory stays flat however large the corpus is.
+    """
+    tasks, total_pages = _tasks(pdf_files, backend, layout)
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    if workers <= 1 or total_pages < MULTIPROCESS_MIN_PAGES:
+        for task in tasks:
+            for text in read_pages(task):
+                yield task[0], text
+        return
+
+    # "spawn": callers may be running other threads, and forking those can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        task_iter = iter(tasks)
+        for task in task_iter:
+            pending.append((task[0], pool.submit(read_pages, task)))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            pdf_path, future = pending.popleft()
+            for text in future.result():
+                yield pdf_path, text
+            for task in task_iter:  # Refill one slot
+                pending.append((task[0], pool.submit(read_pages, task)))
+                break
@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+import tracing
+
+# Items allowed to wait between two stages; keeps a fast stage from running far ahead
+QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+class Stage(NamedTuple):
+    """One step of the pipeline: function(value) -> value, run by `workers` threads."""
+    name: str
+    function: Callable[[Any], Any]
+    workers: int = 1
+
+
+class PipelineResult(NamedTuple):
+    item: Any
+    value: Any                       # Output of the last stage that succeeded
+    failed_stage: Optional[str]      # Name of the stage that raised, if any
+    error: Optional[BaseException]
+
+
+def run_pipeline(items, stages, queue_size=QUEUE_SIZE, on_result=None):
+    """
+    Pushes every item through the stages, which run concurrently and are connected
+    by bounded queues: while one item is being analysed the next can be parsed and a
+    third downloaded. An item whose stage raises skips the remaining stages.
+    on_result(PipelineResult) is called as items leave the pipeline; the returned
+    list keeps the input order. A KeyboardInterrupt or SystemExit raised by a stage
+    makes every later item skip its stages; it is re-raised once the pipeline drained.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    inboxes = [queue.Queue(maxsize=queue_size) for _ in stages]
+    finished = queue.Queue()
+    outboxes = inboxes[1:] + [finished]
+    remaining_workers = [stage.workers for stage in stages]
+    counter_lock = threading.Lock()
+    aborted = []  # KeyboardInterrupt, SystemExit ... raised inside a stage
+
+    def work(position, stage, inbox, outbox):
+        try:
+            while True:
+                job = inbox.get()
+                if job is _DONE:
+                    inbox.put(_DONE)  # Let this stage's other workers see it too
+                    return
+
+                index, value, failed_stage, error = job
+                if error is None and aborted:
+                    failed_stage, error = stage.name, aborted[0]
+                elif error is None:
+                    try:
+                        with tracing.span(stage.name, "pipeline", item=index):
+                            value = stage.function(value)
+                    except Exception as e:
+                        failed_stage, error = stage.name, e
+                    except BaseException as e:
+                        # Keep draining, so upstream stages never block on a full queue
+                        aborted.append(e)
+                        failed_stage, error = stage.name, e
+                outbox.put((index, value, failed_stage, error))
+        finally:
+            # The last worker of a stage always tells the next stage it is done
+            with counter_lock:
+                remaining_workers[position] -= 1
+                last = remaining_workers[position] == 0
+            if last:
+                outbox.put(_DONE)
+
+    threads = [threading.Thread(target=work, args=(position, stage, inbox, outbox),
+                                name=f"prep-{stage.name}-{n}", daemon=True)
+               for position, (stage, inbox, outbox) in enumerate(zip(stages, inboxes, outboxes))
+               for n in range(stage.workers)]
+
+    def feed():
+        for index, item in enumerate(items):
+            inboxes[0].put((index, item, None, None))
+        inboxes[0].put(_DONE)
+
+    threads.append(threading.Thread(target=feed, name="prep-feed", daemon=True))
+    for thread in threads:
+        thread.start()
+
+    results = [None] * len(items)
+    while True:
+        job = finished.get()
+        if job is _DONE:
+            break
+        index, value, failed_stage, error = job
+        results[index] = PipelineResult(items[index], value, failed_stage, error)
+        if on_result:
+            on_result(results[index])
+
+    for thread in threads:
+        thread.join()
+    if aborted:
+        raise aborted[0]
+    return results
+
+
+def timed(function):
+    """Wraps a stage function so the value dict records how long each stage took."""
+    def run(value):
+        start = time.perf_counter()
+        try:
+            return function(value)
+        finally:
+            value.setdefault("timings", {})[function.__name__] = time.perf_counter() - start
+    run.__name__ = function.__name__
+    return run
@@ -0,0 +1,373 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlencode, urlparse
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from cache_paths import cache_path
+import tracing
+
+# Google Drive direct-download endpoint used for question papers
+DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc?export=download&id={file_id}"
+
+MAX_WORKERS = 8        # Size of the download worker pool
+PER_HOST_LIMIT = 4     # Max simultaneous transfers against a single host
+MAX_RETRIES = 3        # Extra attempts after the first failure
+BACKOFF_FACTOR = 0.5   # Sleep 0.5s, 1s, 2s ... between attempts
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MIN_CHUNK_SIZE = 64 * 1024     # Read size at the start of a transfer ...
+MAX_CHUNK_SIZE = 1024 * 1024   # ... doubled up to this while the link keeps up
+PDF_SIGNATURE = b"%PDF-"
+
+_session = None
+_session_lock = threading.Lock()
+_host_limits = {}
+_host_lock = threading.Lock()
+_manifest = None
+_manifest_lock = threading.Lock()
+_file_locks = {}
+
+
+def get_session():
+    """Returns the shared keep-alive session, sized for the worker pool."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def host_slot(url):
+    """Semaphore limiting concurrent transfers to the host of the given URL."""
+    host = urlparse(url).netloc
+    with _host_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_limits[host]
+
+
+def fetch_with_retries(url, session=None, retries=MAX_RETRIES, **kwargs):
+    """GET a URL through the shared session, retrying transient failures with backoff."""
+    session = session or get_session()
+    kwargs.setdefault("timeout", 30)
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, **kwargs)
+            if response.status_code not in RETRY_STATUS or attempt == retries:
+                return response
+            response.close()
+        except requests.RequestException:
+            if attempt == retries:
+                raise
+        time.sleep(BACKOFF_FACTOR * (2 ** attempt))
+
+
+class DownloadError(Exception):
+    """A transfer that should not be counted as done (bad status, HTML instead of PDF, short read)."""
+
+
+class _TransientError(DownloadError):
+    """A failure worth another attempt: retryable status or a transfer cut short."""
+
+
+def _load_manifest():
+    """
+    Reads the manifest once per process. Call with _manifest_lock held.
+    {file_id: {path, size, sha256}} for finished files, {file_id: {partial: validator}}
+    while a .part file is being filled.
+    """
+    global _manifest
+    if _manifest is None:
+        _manifest = {}
+        path = cache_path("downloads_manifest.json")
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            try:
+                with open(path, "r") as file:
+                    _manifest = json.load(file)
+            except (OSError, ValueError):
+                _manifest = {}
+    return _manifest
+
+
+def _save_manifest_entry(file_id, entry):
+    with _manifest_lock:
+        manifest = _load_manifest()
+        if entry is None:
+            manifest.pop(file_id, None)
+        else:
+            manifest[file_id] = entry
+        path = cache_path("downloads_manifest.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file, indent=4)
+        os.replace(tmp_path, path)
+
+
+def _record_download(file_id, save_path, size, digest):
+    _save_manifest_entry(file_id, {"path": os.path.abspath(save_path), "size": size, "sha256": digest})
+
+
+def _partial_validator(file_id):
+    """ETag or Last-Modified of the response the .part file was started from, or None."""
+    with _manifest_lock:
+        return (_load_manifest().get(file_id) or {}).get("partial")
+
+
+def _part_path(file_id):
+    """Partial downloads are keyed by the Drive file, not by the name it is saved under."""
+    return cache_path("partial_downloads", re.sub(r"[^\w-]", "_", file_id) + ".part")
+
+
+def _file_lock(file_id):
+    """One transfer per Drive file at a time, since they share its .part file."""
+    with _manifest_lock:
+        return _file_locks.setdefault(file_id, threading.Lock())
+
+
+def _validator(response):
+    """A validator usable in If-Range: a strong ETag, else Last-Modified."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _range_start(response):
+    """First byte offset of a 206 response ("bytes 100-199/200"), or None when unreadable."""
+    match = re.match(r"bytes\s+(\d+)-", response.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match else None
+
+
+def _discard_partial(file_id, part_path):
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    if _partial_validator(file_id) is not None:
+        _save_manifest_entry(file_id, None)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(MAX_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_already_downloaded(file_id, save_path):
+    """True when the manifest says this Drive file is at save_path with the same size and hash."""
+    with _manifest_lock:
+        entry = _load_manifest().get(file_id)
+    if not entry or entry.get("path") != os.path.abspath(save_path) or not os.path.exists(save_path):
+        return False
+    return os.path.getsize(save_path) == entry["size"] and _sha256(save_path) == entry["sha256"]
+
+
+def _drive_confirm_url(html, file_id):
+    """
+    Large Drive files answer with a "can't scan this file for viruses" page instead of
+    the file. Returns the URL behind its "Download anyway" form, or None.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    form = soup.find("form", id="download-form") or soup.find("form", action=re.compile("download"))
+    if form and form.get("action"):
+        params = {field["name"]: field.get("value", "") for field in form.find_all("input", type="hidden")
+                  if field.get("name")}
+        params.setdefault("id", file_id)
+        return f"{form['action']}?{urlencode(params)}"
+
+    match = re.search(r"confirm=([0-9A-Za-z_-]+)", html)
+    if match:
+        return f"{DRIVE_DOWNLOAD_URL.format(file_id=file_id)}&confirm={match.group(1)}"
+    return None
+
+
+def _is_html(response):
+    return "text/html" in response.headers.get("Content-Type", "")
+
+
+def _transfer(url, file_id, part_path, session, result):
+    """
+    One attempt: resumes part_path from its current size and streams the rest of the file.
+    A resume is only asked for with the validator the partial file was started from
+    (If-Range), so a file that changed on the server is fetched again from the start.
+    """
+    validator = _partial_validator(file_id)
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset and not validator:
+        _discard_partial(file_id, part_path)  # Nothing to prove the bytes are still current
+        offset = 0
+    # Ranges, Content-Length and the .part size all count bytes of the unencoded file
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers.update({"Range": f"bytes={offset}-", "If-Range": validator})
+
+    # Single attempt per call; download_google_drive_file owns the retry loop
+    response = fetch_with_retries(url, session=session, retries=0, stream=True, headers=headers)
+    if response.status_code == 200 and _is_html(response):
+        confirm_url = _drive_confirm_url(response.text, file_id)
+        response.close()
+        if not confirm_url:
+            raise DownloadError("Drive returned an HTML page instead of the file")
+        response = fetch_with_retries(confirm_url, session=session, retries=0, stream=True, headers=headers)
+
+    with response:
+        if response.status_code == 416 and offset:
+            return  # Range past the end: the partial file is already complete
+        if response.status_code in RETRY_STATUS:
+            raise _TransientError(f"status code {response.status_code}")
+        if response.status_code not in (200, 206):
+            raise DownloadError(f"status code {response.status_code}")
+        if _is_html(response):
+            raise DownloadError("Drive returned an HTML page instead of the file")
+        if response.headers.get("Content-Encoding", "identity") != "identity":
+            raise DownloadError(f"unexpected Content-Encoding {response.headers['Content-Encoding']}")
+
+        if response.status_code == 206 and _validator(response) not in (None, validator):
+            _discard_partial(file_id, part_path)  # Server sent a range of a different version
+            raise _TransientError("file changed on the server since the partial download")
+        if response.status_code == 206 and _range_start(response) != offset:
+            _discard_partial(file_id, part_path)  # Appending would misplace the bytes
+            raise _TransientError(f"server sent a range not starting at byte {offset}")
+        if response.status_code == 200:
+            # Fresh transfer (no Range, validator mismatch or Range ignored): start over
+            offset = 0
+            validator = _validator(response)
+            if validator:
+                _save_manifest_entry(file_id, {"partial": validator})
+            elif _partial_validator(file_id) is not None:
+                _save_manifest_entry(file_id, None)
+        else:
+            result["resumed_from"] = offset
+        expected = response.headers.get("Content-Length")
+        expected = offset + int(expected) if expected and expected.isdigit() else None
+
+        received = offset
+        chunk_size = MIN_CHUNK_SIZE
+        with open(part_path, "ab" if offset else "wb") as file:
+            while True:
+                chunk_start = time.perf_counter()
+                chunk = response.raw.read(chunk_size, decode_content=False)
+                if not chunk:
+                    break
+                file.write(chunk)
+                received += len(chunk)
+                result["bytes"] += len(chunk)
+                # Fast link: grow the chunk size so large files need fewer reads
+                if time.perf_counter() - chunk_start < 0.05 and chunk_size < MAX_CHUNK_SIZE:
+                    chunk_size *= 2
+
+        if expected is not None and received < expected:
+            raise _TransientError(f"transfer stopped at {received} of {expected} bytes")
+
+
+def download_google_drive_file(file_id, save_path, session=None):
+    """
+    Download a file from Google Drive using its file ID. Returns a result summary dict.
+
+    Files the manifest already records as complete are skipped. Interrupted transfers
+    continue from the file's .part file with an HTTP Range + If-Range request, and a
+    file only counts as done once it starts with the PDF signature.
+    """
+    url = DRIVE_DOWNLOAD_URL.format(file_id=file_id)
+    result = {"file_id": file_id, "path": save_path, "bytes": 0, "seconds": 0.0, "ok": False,
+              "skipped": False, "resumed_from": 0, "error": None}
+    start = time.perf_counter()
+    part_path = _part_path(file_id)
+
+    try:
+        if is_already_downloaded(file_id, save_path):
+            tracing.count("download.skipped")
+            result["ok"] = result["skipped"] = True
+            print(f"⏭ Already downloaded: {save_path}")
+            return result
+
+        with _file_lock(file_id), host_slot(url), tracing.span("drive_download", "network", file_id=file_id):
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    _transfer(url, file_id, part_path, session or get_session(), result)
+                    break
+                except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+                    if attempt == MAX_RETRIES:
+                        raise DownloadError(str(e))
+                except _TransientError:
+                    if attempt == MAX_RETRIES:
+                        raise
+                time.sleep(BACKOFF_FACTOR * (2 ** attempt))  # Then resume from the .part file
+
+        with open(part_path, "rb") as file:
+            head = file.read(1024)
+        if PDF_SIGNATURE not in head:
+            _discard_partial(file_id, part_path)  # Not resumable into anything useful
+            raise DownloadError("downloaded file is not a PDF")
+
+        shutil.move(part_path, save_path)  # The partial store may be on another filesystem
+        _record_download(file_id, save_path, os.path.getsize(save_path), _sha256(save_path))
+        result["ok"] = True
+        tracing.count("download.files")
+        tracing.count("download.bytes", result["bytes"])
+        print(f"✅ File downloaded: {save_path}")
+    except (DownloadError, OSError) as e:
+        result["error"] = str(e)
+        print(f"❌ Failed to download {save_path}: {e}")
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+    return result
+
+
+def download_files(jobs, max_workers=MAX_WORKERS, progress=None):
+    """
+    Download (file_id, save_path) pairs concurrently over the shared session.
+    Results are returned in the same order as the jobs. progress(done, total, result)
+    is called as each file finishes; an exception it raises cancels the files not yet started.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        futures = [pool.submit(download_google_drive_file, file_id, save_path, session)
+                   for file_id, save_path in jobs]
+        if progress:
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    progress(done, len(jobs), future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return [future.result() for future in futures]
+
+
+def print_download_summary(results):
+    """Prints bytes and time per file plus the batch totals."""
+    if not results:
+        return
+
+    print("\n📦 Download summary:")
+    for result in results:
+        status = "⏭" if result.get("skipped") else "✅" if result["ok"] else "❌"
+        size_kb = result["bytes"] / 1024
+        resumed = f" (resumed at {result['resumed_from'] / 1024:.1f} KB)" if result.get("resumed_from") else ""
+        print(f"{status} {os.path.basename(result['path'])}: {size_kb:.1f} KB in {result['seconds']:.2f}s{resumed}")
+
+    total_bytes = sum(r["bytes"] for r in results)
+    slowest = max(r["seconds"] for r in results)
+    ok_count = sum(1 for r in results if r["ok"])
+    print(f"📊 {ok_count}/{len(results)} files, {total_bytes / 1024:.1f} KB total, slowest file {slowest:.2f}s")
@@ -0,0 +1,114 @@
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task once cancel() has been requested."""
+
+
+class TaskSignals(QObject):
+    """
+    Signals of one background task. They are delivered on the UI thread (queued
+    connections), so slots may touch widgets directly.
+    """
+    progress = pyqtSignal(int, int, str)   # done, total (0 = unknown), message
+    partial = pyqtSignal(object)           # Intermediate result worth showing early
+    result = pyqtSignal(object)            # Return value of the task function
+    error = pyqtSignal(str)                # Formatted exception
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()                # Always last, whatever the outcome
+
+
+class TaskContext:
+    """
+    Handed to the task function as its first argument. Long loops report through
+    progress()/partial() and call check_cancelled() between steps; both reports
+    also raise TaskCancelled so callback-driven library code stops promptly.
+    """
+
+    def __init__(self, signals):
+        self._signals = signals
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+
+    def check_cancelled(self):
+        if self._cancelled:
+            raise TaskCancelled()
+
+    def progress(self, done, total=0, message=""):
+        self.check_cancelled()
+        self._signals.progress.emit(int(done), int(total), message)
+
+    def partial(self, value):
+        self.check_cancelled()
+        self._signals.partial.emit(value)
+
+
+class Task(QRunnable):
+    """Runs function(context, *args, **kwargs) on a QThreadPool thread."""
+
+    def __init__(self, function, *args, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.context = TaskContext(self.signals)
+
+    def cancel(self):
+        self.context.cancel()
+
+    def run(self):
+        try:
+            self.context.check_cancelled()  # Cancelled while still queued
+            value = self.function(self.context, *self.args, **self.kwargs)
+            self.context.check_cancelled()
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception:
+            self.signals.error.emit(traceback.format_exc())
+        else:
+            self.signals.result.emit(value)
+        finally:
+            self.signals.finished.emit()
+
+
+class TaskRunner(QObject):
+    """
+    Starts Tasks on a QThreadPool and keeps them referenced until they finish, so
+    their signal objects outlive the Python wrappers. One runner per window.
+    """
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._running = set()
+
+    def submit(self, function, *args, on_result=None, on_partial=None, on_progress=None,
+               on_error=None, on_cancelled=None, on_finished=None, **kwargs):
+        task = Task(function, *args, **kwargs)
+        task.setAutoDelete(False)  # Python keeps the reference; see _running
+        # Connected first so on_finished already sees the task as done
+        task.signals.finished.connect(lambda: self._running.discard(task))
+        for signal, slot in ((task.signals.result, on_result), (task.signals.partial, on_partial),
+                             (task.signals.progress, on_progress), (task.signals.error, on_error),
+                             (task.signals.cancelled, on_cancelled), (task.signals.finished, on_finished)):
+            if slot:
+                signal.connect(slot)
+        self._running.add(task)
+        self.pool.start(task)
+        return task
+
+    def busy(self):
+        return bool(self._running)
+
+    def cancel_all(self):
+        for task in list(self._running):
+            task.cancel()
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and caches its result for `ttl` seconds.
+    Callers that arrive while a call for the same key is running wait for it and
+    share its result (or its exception) instead of starting their own.
+
+    Exceptions are never cached. Empty results ([], {}, None ...) usually mean the
+    scrape failed quietly, so they are only kept for `empty_ttl` seconds. At most
+    `max_entries` results are kept; expired ones go first, then the oldest.
+    """
+
+    def __init__(self, ttl=300, empty_ttl=30, max_entries=1024):
+        self.ttl = ttl
+        self.empty_ttl = min(empty_ttl, ttl)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._results = {}  # key -> (value, expires_at), oldest first
+        self._stats = Counter()
+
+    def _fresh(self, key):
+        """(True, value) for an unexpired result, else (False, None). Call with _lock held."""
+        cached = self._results.get(key)
+        if cached is None:
+            return False, None
+        if time.monotonic() >= cached[1]:
+            del self._results[key]
+            return False, None
+        return True, cached[0]
+
+    def _store(self, key, value):
+        """Caches a result and keeps the cache within max_entries. Call with _lock held."""
+        ttl = self.ttl if value else self.empty_ttl
+        self._results.pop(key, None)  # Re-insert so the dict stays in age order
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        self._results[key] = (value, now + ttl)
+        if len(self._results) > self.max_entries:
+            for expired in [k for k, (_, expires_at) in self._results.items() if expires_at <= now]:
+                del self._results[expired]
+            while len(self._results) > self.max_entries:
+                del self._results[next(iter(self._results))]
+                self._stats["evictions"] += 1
+
+    def do(self, key, function, *args, **kwargs):
+        with self._lock:
+            found, value = self._fresh(key)
+            if found:
+                self._stats["hits"] += 1
+                return value
+
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self._stats["executions"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:  # ttl=0 only coalesces, nothing is kept
+                self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def peek(self, key):
+        """Returns (True, value) for a fresh cached result, else (False, None)."""
+        with self._lock:
+            found, value = self._fresh(key)
+            if found:
+                self._stats["hits"] += 1
+            return found, value
+
+    def put(self, key, value):
+        """Caches a result computed elsewhere, e.g. one course out of a batch."""
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key=None):
+        """Drops one cached result, or all of them."""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = {name: self._stats[name] for name in ("hits", "coalesced", "executions", "evictions")}
+            stats["entries"] = len(self._results)
+            return stats
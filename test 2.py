@@ -1,89 +1,50 @@
-import json
-import os
-import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-
-KTU_NOTES_URL = "https://examtimetable.ktunotes.in/"
-USER_DATA_FILE = "user_data.json"
-
-def load_users():
-    if os.path.exists(USER_DATA_FILE):
-        with open(USER_DATA_FILE, "r") as file:
-            return json.load(file)
-    return {}
-
-def save_users(users):
-    with open(USER_DATA_FILE, "w") as file:
-        json.dump(users, file, indent=4)
+from browser_pool import fetch_timetable_text
+import timetable_cache
+from timetable_index import index_for, format_record
+from user_store import users, UserExistsError
 
 def register_user():
-    users = load_users()
     name = input("Enter your name: ")
     semester = input("Enter Semester (e.g., S1, S2, S3): ")
     branch = input("Enter Branch (e.g., Computer Science, Mechanical, Civil): ")
     scheme = input("Enter Scheme (e.g., 2019, 2022): ")
-    users[name] = {"semester": semester, "branch": branch, "scheme": scheme}
-    save_users(users)
+    try:
+        users.add(name, name, semester, branch, scheme)  # This script keys users by name
+    except UserExistsError:
+        users.update(name, semester=semester, branch=branch, scheme=scheme)
     print(f"User {name} registered successfully!")
 
 def select_user():
-    users = load_users()
-    if not users:
+    if not users.count():
         print("No users found. Please register first.")
         register_user()
         return select_user()
     
     print("Available Users:")
-    for index, name in enumerate(users.keys(), start=1):
+    user_list = users.list()
+    for index, (name, _) in enumerate(user_list, start=1):
         print(f"{index}. {name}")
     
     choice = int(input("Select your user number: "))
-    user_name = list(users.keys())[choice - 1]
+    user_name, user_details = user_list[choice - 1]
     print(f"Welcome back, {user_name}!")
-    return user_name, users[user_name]
+    return user_name, user_details
 
 def get_exam_timetable(semester, branch, scheme):
-    options = Options()
-    options.add_argument("--headless")
-    service = Service(r"C:\\Users\\Kurian Tony Aloor\\Downloads\\chromedriver-win64\\chromedriver-win64\\chromedriver.exe")
-    driver = webdriver.Chrome(service=service, options=options)
-    
-    try:
-        driver.get(KTU_NOTES_URL)
-        time.sleep(3)
-        
-        Select(driver.find_element(By.ID, "sem")).select_by_visible_text(semester)
-        time.sleep(2)
-        Select(driver.find_element(By.ID, "branch")).select_by_visible_text(branch)
-        time.sleep(2)
-        Select(driver.find_element(By.ID, "scheme")).select_by_visible_text(scheme)
-        time.sleep(2)
-        
-        timetable_element = driver.find_element(By.CLASS_NAME, "table-responsive.mt-3")
-        timetable_text = timetable_element.text
-        return timetable_text
-    
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
-    
-    finally:
-        driver.quit()
+    timetable_text = timetable_cache.get_timetable(
+        semester, branch, scheme,
+        lambda: fetch_timetable_text(semester, branch, scheme, table_class="table-responsive mt-3"))
+    return timetable_text or None
 
 def find_exam_date(timetable, course):
-    lines = timetable.split("\n")
-    for line in lines:
-        if course.lower() in line.lower():
-            return line
+    matches = index_for(timetable).lookup(course)
+    if matches:
+        return format_record(matches[0])
     return "Course not found in timetable."
 
 if __name__ == "__main__":
     user_name, user_details = select_user()
-    semester, branch, scheme = user_details.values()
+    semester, branch, scheme = user_details["semester"], user_details["branch"], user_details["scheme"]
     
     exam_schedule = get_exam_timetable(semester, branch, scheme)
     
@@ -0,0 +1,143 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import cache_paths
+import pyq_downloader
+
+BODY = b"%PDF-1.4\n" + bytes(range(256)) * 800
+FILE_ID = "paper_1"
+
+
+class DriveHandler(BaseHTTPRequestHandler):
+    """Drive-style download endpoint with Range/If-Range support and switchable misbehaviour."""
+    body = BODY
+    etag = '"v1"'
+    mode = "normal"   # normal | ignore_range | wrong_range_once | ignore_if_range
+    seen = []         # Request headers, in order
+
+    def do_GET(self):
+        handler = type(self)
+        handler.seen.append(dict(self.headers))
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        honour = (match and handler.mode != "ignore_range"
+                  and (self.headers.get("If-Range") == handler.etag or handler.mode == "ignore_if_range"))
+
+        if not honour:
+            self.send_response(200)
+            start = 0
+        else:
+            start = label = int(match.group(1))
+            if handler.mode == "wrong_range_once":
+                handler.mode = "normal"
+                start = label = 0  # A range, but not the one that was asked for
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {label}-{len(handler.body) - 1}/{len(handler.body)}")
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("ETag", handler.etag)
+        self.send_header("Content-Length", str(len(handler.body) - start))
+        self.end_headers()
+        self.wfile.write(handler.body[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def drive(tmp_path, monkeypatch):
+    """A local Drive stand-in; caches and the manifest live in tmp_path."""
+    monkeypatch.setattr(cache_paths, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(pyq_downloader, "_manifest", None)
+    monkeypatch.setattr(pyq_downloader, "BACKOFF_FACTOR", 0)
+    monkeypatch.setattr(DriveHandler, "body", BODY)
+    monkeypatch.setattr(DriveHandler, "etag", '"v1"')
+    monkeypatch.setattr(DriveHandler, "mode", "normal")
+    monkeypatch.setattr(DriveHandler, "seen", [])
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DriveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(pyq_downloader, "DRIVE_DOWNLOAD_URL",
+                        f"http://127.0.0.1:{server.server_address[1]}/uc?id={{file_id}}")
+    yield DriveHandler
+    server.shutdown()
+    server.server_close()
+
+
+def start_partial(size, validator='"v1"'):
+    """Leaves a .part file with the first `size` bytes, as an interrupted transfer would."""
+    with open(pyq_downloader._part_path(FILE_ID), "wb") as file:
+        file.write(BODY[:size])
+    pyq_downloader._save_manifest_entry(FILE_ID, {"partial": validator})
+
+
+def download(tmp_path):
+    with requests.Session() as session:
+        return pyq_downloader.download_google_drive_file(FILE_ID, str(tmp_path / "paper.pdf"), session=session)
+
+
+def saved(tmp_path):
+    return (tmp_path / "paper.pdf").read_bytes()
+
+
+def test_full_download_is_recorded(drive, tmp_path):
+    result = download(tmp_path)
+    assert result["ok"] and result["resumed_from"] == 0
+    assert saved(tmp_path) == BODY
+    assert drive.seen[0].get("Accept-Encoding") == "identity"
+    assert "Range" not in drive.seen[0]
+    assert pyq_downloader.is_already_downloaded(FILE_ID, str(tmp_path / "paper.pdf"))
+
+
+def test_second_download_is_skipped(drive, tmp_path):
+    download(tmp_path)
+    result = download(tmp_path)
+    assert result["skipped"] and len(drive.seen) == 1
+
+
+def test_resumes_from_partial_file(drive, tmp_path):
+    start_partial(5000)
+    result = download(tmp_path)
+    assert result["ok"] and result["resumed_from"] == 5000
+    assert result["bytes"] == len(BODY) - 5000
+    assert drive.seen[0]["Range"] == "bytes=5000-"
+    assert drive.seen[0]["If-Range"] == '"v1"'
+    assert saved(tmp_path) == BODY
+
+
+def test_range_ignored_starts_over(drive, tmp_path):
+    drive.mode = "ignore_range"
+    start_partial(5000)
+    result = download(tmp_path)
+    assert result["ok"] and result["resumed_from"] == 0
+    assert saved(tmp_path) == BODY
+
+
+def test_mismatched_content_range_is_not_appended(drive, tmp_path):
+    drive.mode = "wrong_range_once"
+    start_partial(5000)
+    result = download(tmp_path)
+    assert result["ok"]
+    assert len(drive.seen) == 2 and "Range" not in drive.seen[1]  # Partial dropped, fetched afresh
+    assert saved(tmp_path) == BODY
+
+
+def test_changed_etag_discards_partial(drive, tmp_path):
+    drive.mode = "ignore_if_range"  # Sends a range of the new version anyway
+    drive.etag = '"v2"'
+    start_partial(5000, validator='"v1"')
+    result = download(tmp_path)
+    assert result["ok"]
+    assert len(drive.seen) == 2 and "Range" not in drive.seen[1]
+    assert saved(tmp_path) == BODY
+
+
+def test_changed_etag_with_if_range_refetches_whole_file(drive, tmp_path):
+    drive.etag = '"v2"'
+    start_partial(5000, validator='"v1"')
+    result = download(tmp_path)
+    assert result["ok"] and result["resumed_from"] == 0
+    assert len(drive.seen) == 1 and drive.seen[0]["If-Range"] == '"v1"'
+    assert saved(tmp_path) == BODY
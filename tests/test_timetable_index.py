@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from date_extractor import find_date
+from timetable_index import index_for, parse_line, parse_timetable
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "benchmarks", "fixtures", "timetable_page.txt")
+
+
+@pytest.fixture(scope="module")
+def index():
+    with open(FIXTURE, encoding="utf-8") as file:
+        return index_for(file.read())
+
+
+def codes(records):
+    return [record.course_code for record in records]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("theory", ["MAT206", "MAT286"]),
+    ("lab", ["CSL202", "CSL204"]),
+    ("systems lab", ["CSL204"]),
+    ("operating sys", ["CST206", "CSL204"]),
+    ("graph", ["MAT206"]),
+])
+def test_lookup_matches_non_leading_words(index, query, expected):
+    assert codes(index.lookup(query)) == expected
+
+
+def test_fuzzy_matches_a_single_misspelt_word(index):
+    assert codes(index.lookup("databse")) == ["CST204"]
+
+
+@pytest.mark.parametrize("query", ["computer networks", "compiler design", "theory of computation"])
+def test_one_shared_word_is_not_a_match(index, query):
+    assert index.lookup(query) == []
+
+
+def test_fuzzy_multi_word_query_needs_every_word(index):
+    assert codes(index.lookup("databse managment systms")) == ["CST204"]
+    assert codes(index.lookup("constitusion of india")) == ["MCN202"]
+
+
+def test_resolve_reports_fuzzy_matches():
+    index = index_for("1 14-05-2024 FN A MAT206 GRAPH THEORY")
+    assert index.resolve("MAT206")[1] is True
+    assert index.resolve("graph")[1] is True
+    assert index.resolve("grph theory")[1] is False
+
+
+def test_lookup_by_code(index):
+    assert codes(index.lookup("cst 204")) == ["CST204"]
+
+
+def test_codeless_lines_without_session_or_slot_are_skipped():
+    assert parse_line("Controller of Examinations 2024-04-22") is None
+    assert parse_line("Time Table - Revised - Notification No. EX/1267/2024 dated 22-04-2024") is None
+
+
+def test_dotted_clause_numbers_are_not_dates():
+    assert find_date("Note 3: Grace marks as per Regulation 3.5.10 of the B.Tech rules.") is None
+
+
+def test_codeless_rows_never_inherit_a_session():
+    records = parse_timetable("1 14-05-2024 FN A MAT206 GRAPH THEORY\n"
+                              "16-05-2024 Slot B Open elective")
+    assert records[-1].course_code is None
+    assert records[-1].session is None
+    assert records[-1].slot == "B"
+
+
+def test_fixture_has_only_course_rows(index):
+    assert all(record.course_code for record in index.records)
+    assert len(index.records) == 10
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+
+from cache_paths import cache_path
+
+# Upper bound for the extracted-text cache; least recently used entries go first
+MAX_CACHE_BYTES = int(os.environ.get("KTU_TEXT_CACHE_MB", "256")) * 1024 * 1024
+# Eviction trims to this fraction of the limit, so the next few writes do not trigger it again
+EVICT_TO = 0.9
+
+_lock = threading.Lock()
+_total_bytes = None  # Size of the cache, measured once per process and then tracked on writes
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(path, extractor_version, stopwords):
+    """Key made of the file content, the extractor version and the stopword set."""
+    stopword_digest = hashlib.sha256("\n".join(sorted(stopwords)).encode("utf-8")).hexdigest()
+    combined = f"{file_digest(path)}:{extractor_version}:{stopword_digest}"
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return cache_path("text", key[:2], f"{key}.json")
+
+
+def get_pages(key):
+    """Returns the cached per-page text for a key, or None on a miss."""
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            pages = json.load(file)["pages"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+    try:
+        os.utime(path)  # Mark as recently used for LRU eviction
+    except OSError:
+        pass
+    return pages
+
+
+def put_pages(key, pages):
+    """
+    Stores per-page text under a key; the cache is only scanned and trimmed once it
+    outgrows its limit. Best effort: an entry that cannot be written is just not cached.
+    """
+    global _total_bytes
+    tmp_path = None
+    try:
+        path = _entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"pages": pages}, file)
+        written = os.path.getsize(tmp_path)  # Sized before a concurrent evict() can remove it
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠ Could not cache extracted text: {e}")
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return
+
+    with _lock:
+        if _total_bytes is not None:
+            _total_bytes += written - replaced
+        total = _total_bytes
+    if total is None:
+        evict()  # First write in this process: measure the cache (and trim it if needed)
+    elif total > MAX_CACHE_BYTES:
+        evict(int(MAX_CACHE_BYTES * EVICT_TO))
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """Deletes least recently used entries until the cache fits in max_bytes."""
+    global _total_bytes
+    root = os.path.dirname(os.path.dirname(_entry_path("00")))
+    with _lock:
+        entries = []
+        for folder, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        _total_bytes = total
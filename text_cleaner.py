@@ -0,0 +1,95 @@
+import os
+import re
+import threading
+
+import tracing
+
+SPACY_MODEL = "en_core_web_sm"
+# clean_text only reads token.is_stop / token.is_punct, which come from the tokenizer
+# and vocabulary, so none of the trained components need to be loaded
+UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner", "senter"]
+
+MAX_CHUNK_CHARS = 100_000     # Well under spaCy's default max_length of 1,000,000
+BATCH_SIZE = 64
+MULTIPROCESS_MIN_DOCS = 256   # Below this, spawning worker processes costs more than it saves
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """Loads the spaCy pipeline once, tokenizer and vocabulary only."""
+    global _nlp
+    with _nlp_lock:
+        if _nlp is None:
+            import spacy
+            _nlp = spacy.load(SPACY_MODEL, exclude=UNUSED_COMPONENTS)
+        return _nlp
+
+
+def stop_words():
+    """spaCy's English stop words, without loading the pipeline."""
+    from spacy.lang.en.stop_words import STOP_WORDS
+    return STOP_WORDS
+
+
+def preprocess(text):
+    text = text.lower().strip()
+    text = re.sub(r'\d+', '', text)  # Remove numbers
+    text = re.sub(r'\s+', ' ', text)  # Remove extra spaces
+    return text
+
+
+def split_chunks(text, max_chars=None):
+    """
+    Splits preprocessed text at spaces into pieces of at most max_chars.
+    spaCy tokenizes each space-separated substring on its own, so the tokens
+    of the pieces are exactly the tokens of the whole text.
+    """
+    max_chars = max_chars or MAX_CHUNK_CHARS
+    chunks = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars  # A single "word" longer than a chunk; split it anyway
+        chunks.append(text[:cut])
+        text = text[cut + 1:] if text[cut:cut + 1] == " " else text[cut:]
+    chunks.append(text)
+    return chunks
+
+
+def clean_texts(texts, extra_stopwords=frozenset(), n_process=None, batch_size=BATCH_SIZE):
+    """
+    Cleans many texts in one nlp.pipe run (removes stopwords, punctuation and numbers).
+    Returns one cleaned string per input, identical to cleaning them one at a time.
+    Worker processes are only used when called from the main thread.
+    """
+    nlp = get_nlp()
+
+    chunks, owners = [], []
+    for index, text in enumerate(texts):
+        for chunk in split_chunks(preprocess(text)):
+            chunks.append(chunk)
+            owners.append(index)
+
+    if n_process is None:
+        n_process = min(os.cpu_count() or 1, 4) if len(chunks) >= MULTIPROCESS_MIN_DOCS else 1
+    if threading.current_thread() is not threading.main_thread():
+        # nlp.pipe forks its workers on Linux; forking beside the GUI/pipeline threads can deadlock
+        n_process = 1
+
+    words = [[] for _ in texts]
+    tokens = 0
+    with tracing.span("spacy_clean", "nlp", texts=len(texts), chunks=len(chunks)):
+        for owner, doc in zip(owners, nlp.pipe(chunks, batch_size=batch_size, n_process=n_process)):
+            tokens += len(doc)
+            words[owner].extend(token.text for token in doc
+                                if not token.is_stop and not token.is_punct and token.text not in extra_stopwords)
+    tracing.count("nlp.tokens", tokens)
+
+    return [" ".join(text_words) for text_words in words]
+
+
+def clean_text(text, extra_stopwords=frozenset()):
+    """Cleans a single text; see clean_texts."""
+    return clean_texts([text], extra_stopwords, n_process=1)[0]
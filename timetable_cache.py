@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+
+from cache_paths import cache_path
+import tracing
+
+# Seconds a scraped timetable is served as fresh (KTU_TIMETABLE_TTL, default 6 hours)
+DEFAULT_TTL = int(os.environ.get("KTU_TIMETABLE_TTL", str(6 * 60 * 60)))
+# Past the TTL a copy is still served while a background refresh runs, up to this age
+MAX_STALE = 7 * 24 * 60 * 60
+
+_entries = None
+_lock = threading.Lock()
+_key_locks = {}
+_refreshing = set()
+
+
+def _cache_file():
+    return cache_path("timetables.json")
+
+
+def _key(semester, branch, scheme):
+    return f"{semester}|{branch}|{scheme}".upper()
+
+
+def _load():
+    """Reads the on-disk entries once per process. Call with _lock held."""
+    global _entries
+    if _entries is None:
+        _entries = {}
+        path = _cache_file()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            try:
+                with open(path, "r") as file:
+                    _entries = json.load(file)
+            except (OSError, ValueError):
+                _entries = {}
+    return _entries
+
+
+def _save():
+    """Writes all entries atomically. Call with _lock held."""
+    path = _cache_file()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            json.dump(_entries, file)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # Memory copy still serves this process
+
+
+def _key_lock(key):
+    with _lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def _store(key, text):
+    with _lock:
+        _load()[key] = {"text": text, "fetched_at": time.time()}
+        _save()
+
+
+def _reload(key, loader):
+    """Runs the loader once per key at a time; empty results are not cached."""
+    with _key_lock(key):
+        text = loader()
+        if text:
+            _store(key, text)
+        return text
+
+
+def _refresh_in_background(key, loader):
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            _reload(key, loader)
+        except Exception as e:
+            print(f"⚠ Background timetable refresh failed: {e}")
+        finally:
+            with _lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def get_timetable(semester, branch, scheme, loader, ttl=None):
+    """
+    Returns the timetable for (semester, branch, scheme), calling loader() only when needed.
+    Fresh entries are returned as-is; entries past the TTL are returned immediately
+    while a background thread re-scrapes them; missing or very old entries are
+    loaded synchronously.
+    """
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    key = _key(semester, branch, scheme)
+
+    with _lock:
+        entry = _load().get(key)
+
+    if entry:
+        age = time.time() - entry["fetched_at"]
+        if age < ttl:
+            tracing.count("timetable_cache.hit")
+            return entry["text"]
+        if age < MAX_STALE:
+            tracing.count("timetable_cache.stale")
+            _refresh_in_background(key, loader)
+            return entry["text"]
+
+    with _key_lock(key):
+        # Another caller may have loaded it while we waited
+        with _lock:
+            entry = _load().get(key)
+        if entry and time.time() - entry["fetched_at"] < ttl:
+            return entry["text"]
+
+        tracing.count("timetable_cache.miss")
+        with tracing.span("load_timetable", "network", key=key):
+            text = loader()
+        if text:
+            _store(key, text)
+        return text
+
+
+def invalidate(semester=None, branch=None, scheme=None):
+    """Drops one cached timetable, or all of them when called without arguments."""
+    with _lock:
+        entries = _load()
+        if semester is None and branch is None and scheme is None:
+            entries.clear()
+        else:
+            entries.pop(_key(semester, branch, scheme), None)
+        _save()
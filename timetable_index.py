@@ -0,0 +1,235 @@
+import bisect
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from datetime import date
+from typing import NamedTuple, Optional
+
+from date_extractor import find_date
+
+
+class ExamRecord(NamedTuple):
+    """One exam in a scraped timetable."""
+    date: Optional[date]
+    session: Optional[str]     # "FN" or "AN"
+    course_code: Optional[str]  # Normalised, e.g. "MAT206"
+    course_name: str
+    slot: Optional[str]
+    line: str                  # The raw timetable line the record came from
+
+
+COURSE_CODE = re.compile(r"\b([A-Z]{2,4})\s?-?(\d{3})\b")
+SESSION = re.compile(r"\b(FN|AN|F\.N\.?|A\.N\.?|forenoon|afternoon|morning|evening)\b", re.IGNORECASE)
+SLOT = re.compile(r"(?:\bslot\s*)?\b([A-T])\b")
+EXPLICIT_SLOT = re.compile(r"\bslot\s*([A-T])\b", re.IGNORECASE)
+LEADING_SERIAL = re.compile(r"^\s*\d{1,3}[.)]?\s+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _normalise_session(value):
+    value = value.lower().replace(".", "")
+    return "FN" if value in ("fn", "forenoon", "morning") else "AN"
+
+
+def normalise(text):
+    """Lowercase, punctuation-free form used for name lookups."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def parse_line(line, previous=None):
+    """
+    Parses one timetable line into an ExamRecord, or None for headers and notes.
+    Rows with a course code that omit the date or session (merged cells) inherit them
+    from the previous row. A row without a code is only kept when it carries its own
+    date and session or "Slot X", so signatures and "dated ..." headers are skipped.
+    """
+    rest = LEADING_SERIAL.sub("", line.strip())
+    if not rest:
+        return None
+
+    exam_date = None
+    found = find_date(rest)
+    if found:
+        exam_date, start, end = found
+        rest = rest[:start] + " " + rest[end:]
+
+    session = None
+    session_match = SESSION.search(rest)
+    if session_match:
+        session = _normalise_session(session_match.group(1))
+        rest = rest[:session_match.start()] + " " + rest[session_match.end():]
+
+    course_code = None
+    slot = None
+    code_match = COURSE_CODE.search(rest)
+    if code_match:
+        course_code = code_match.group(1) + code_match.group(2)
+        before, course_name = rest[:code_match.start()], rest[code_match.end():]
+        slot_match = SLOT.search(before)  # Slot letters sit before the code
+        if slot_match:
+            slot = slot_match.group(1)
+    else:
+        course_name = rest
+        slot_match = EXPLICIT_SLOT.search(rest)
+        if slot_match:
+            slot = slot_match.group(1).upper()
+            course_name = rest[:slot_match.start()] + " " + rest[slot_match.end():]
+
+    course_name = " ".join(course_name.strip(" -:|,").split())
+    if not course_code:
+        if not (exam_date and course_name and (session or slot)):
+            return None  # Header, footnote, signature or blank row
+        return ExamRecord(exam_date, session, None, course_name, slot, line.strip())
+
+    if previous:
+        exam_date = exam_date or previous.date
+        session = session or previous.session
+    return ExamRecord(exam_date, session, course_code, course_name, slot, line.strip())
+
+
+def parse_timetable(text):
+    """Parses raw timetable text (one row per line) into ExamRecords."""
+    records = []
+    for line in text.split("\n"):
+        record = parse_line(line, records[-1] if records else None)
+        if record:
+            records.append(record)
+    return records
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _name_suffixes(name):
+    """"operating systems lab" -> the name starting at each word, so any word can lead a prefix."""
+    words = name.split()
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+class TimetableIndex:
+    """
+    Lookups over parsed exam records: exact course code (dict), prefix search over
+    codes and every word of the names (sorted keys + bisect) and typo-tolerant search
+    (trigram index, scored separately against the code, the full name and each word;
+    a multi-word query needs the full name or all of its words to match).
+    """
+
+    def __init__(self, records):
+        self.records = list(records)
+        self._by_code = defaultdict(list)
+        prefix_keys = []
+        self._trigrams = defaultdict(set)   # trigram -> ids into _fuzzy_keys
+        self._fuzzy_keys = []               # (record position, trigram count, whole name/code?) per key
+
+        for position, record in enumerate(self.records):
+            name = normalise(record.course_name)
+            keys = _name_suffixes(name)
+            whole_keys = {name}
+            if record.course_code:
+                self._by_code[record.course_code].append(position)
+                keys.add(record.course_code.lower())
+                whole_keys.add(record.course_code.lower())
+
+            for key in keys:
+                prefix_keys.append((key, position))
+            fuzzy_keys = {key: True for key in whole_keys}
+            fuzzy_keys.update((word, False) for word in name.split() if word not in whole_keys)
+            for key, whole in fuzzy_keys.items():
+                if not key:
+                    continue
+                grams = _trigrams(key)
+                for gram in grams:
+                    self._trigrams[gram].add(len(self._fuzzy_keys))
+                self._fuzzy_keys.append((position, len(grams), whole))
+
+        prefix_keys.sort()
+        self._prefix_keys = [key for key, _ in prefix_keys]
+        self._prefix_positions = [position for _, position in prefix_keys]
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(parse_timetable(text))
+
+    def by_code(self, course_code):
+        code_match = COURSE_CODE.fullmatch(course_code.strip().upper())
+        if not code_match:
+            return []
+        return [self.records[p] for p in self._by_code.get(code_match.group(1) + code_match.group(2), [])]
+
+    def prefix(self, query):
+        query = normalise(query)
+        if not query:
+            return []
+        start = bisect.bisect_left(self._prefix_keys, query)
+        end = bisect.bisect_right(self._prefix_keys, query + "\uffff")
+        positions = sorted(set(self._prefix_positions[start:end]))
+        return [self.records[p] for p in positions]
+
+    def _key_scores(self, text, min_score, whole_only=False):
+        """{record position: best Dice score of the text against its keys}, for scores >= min_score."""
+        grams = _trigrams(text)
+        shared = Counter()
+        for gram in grams:
+            for key_id in self._trigrams.get(gram, ()):
+                shared[key_id] += 1
+
+        best = {}
+        for key_id, count in shared.items():
+            position, key_grams, whole = self._fuzzy_keys[key_id]
+            if whole_only and not whole:
+                continue
+            score = 2 * count / (len(grams) + key_grams)
+            if score >= min_score and score > best.get(position, 0):
+                best[position] = score
+        return best
+
+    def fuzzy(self, query, limit=5, min_score=0.45):
+        """
+        Records whose code, name or one name word shares enough trigrams with the query
+        (Dice coefficient). A multi-word query has to match the full name, or else every
+        one of its words has to match some key, so one shared word is not enough.
+        """
+        words = normalise(query).split()
+        if len(words) <= 1:
+            best = self._key_scores(" ".join(words), min_score)
+        else:
+            best = self._key_scores(" ".join(words), min_score, whole_only=True)
+            per_word = [self._key_scores(word, min_score) for word in words]
+            for position in set.intersection(*(set(scores) for scores in per_word)):
+                score = sum(scores[position] for scores in per_word) / len(words)
+                best[position] = max(score, best.get(position, 0))
+        scored = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return [self.records[p] for p, _ in scored[:limit]]
+
+    def resolve(self, query):
+        """(records, exact): exact is False when only the typo-tolerant search found them."""
+        records = self.by_code(query) or self.prefix(query)
+        if records:
+            return records, True
+        return self.fuzzy(query), False
+
+    def lookup(self, query):
+        """Exact code first, then prefix, then typo-tolerant matches."""
+        return self.resolve(query)[0]
+
+
+@lru_cache(maxsize=8)
+def index_for(timetable_text):
+    """Parses and indexes a timetable once; repeated queries on the same text reuse it."""
+    return TimetableIndex.from_text(timetable_text)
+
+
+def format_record(record):
+    """Human-readable one-liner, e.g. "14 May 2024 (FN) - MAT206 GRAPH THEORY [Slot A]"."""
+    parts = [record.date.strftime("%d %b %Y") if record.date else "Date not listed"]
+    if record.session:
+        parts.append(f"({record.session})")
+    parts.append("-")
+    if record.course_code:
+        parts.append(record.course_code)
+    parts.append(record.course_name)
+    if record.slot:
+        parts.append(f"[Slot {record.slot}]")
+    return " ".join(part for part in parts if part)
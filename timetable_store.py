@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from cache_paths import cache_path
+import tracing
+
+# How often the background refresher re-reads the KTU listing (KTU_STORE_REFRESH, seconds)
+REFRESH_INTERVAL = int(os.environ.get("KTU_STORE_REFRESH", "600"))
+# Lookups fall back to a live scrape when the last successful refresh is older than this
+MAX_AGE = 3 * REFRESH_INTERVAL
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdfs (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    dates TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pdfs_position ON pdfs (position);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class TimetableStore:
+    """
+    Local SQLite copy of the extracted dates of the timetable PDFs for every course
+    that has been looked up, kept warm by a background refresher so repeat lookups
+    never touch the network. A course the store does not cover yet is answered by a
+    live scrape and picked up by the next refresh, so the first refresh only
+    downloads the PDFs of the courses actually asked for.
+
+    The store is agnostic of the scraper that fills it:
+        get_listing()              -> [{"title", "url"}, ...]
+        fetch_pdf(url, headers)    -> (status_code, content, response_headers), 304 allowed
+        extract_pdf(content)       -> list of dates/lines for one PDF
+        title_matches(code, title) -> whether a PDF belongs to a course
+    """
+
+    def __init__(self, name, get_listing, fetch_pdf, extract_pdf, title_matches, max_age=MAX_AGE):
+        self.name = name
+        self.get_listing = get_listing
+        self.fetch_pdf = fetch_pdf
+        self.extract_pdf = extract_pdf
+        self.title_matches = title_matches
+        self.max_age = max_age
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._ready = False
+        self._tracked = None
+        self._tracked_lock = threading.Lock()
+
+    @property
+    def path(self):
+        return cache_path(f"timetable_store_{self.name}.db")
+
+    @contextmanager
+    def _connect(self):
+        """A connection that commits (or rolls back) and is closed when the block ends."""
+        # The database is created on first write, not when the scraper module is imported
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            if not self._ready:
+                db.execute("PRAGMA journal_mode=WAL")  # Readers are never blocked by the refresher
+                db.executescript(SCHEMA)
+                self._ready = True
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _meta(self):
+        """{key: value} of the meta table, or {} while the database does not exist yet."""
+        if not os.path.exists(self.path):
+            return {}
+        with self._connect() as db:
+            return dict(db.execute("SELECT key, value FROM meta").fetchall())
+
+    def last_refresh(self):
+        value = self._meta().get("last_refresh")
+        return float(value) if value else None
+
+    def _tracked_courses(self):
+        """Courses the refresher keeps warm: those covered last time plus any asked for since."""
+        with self._tracked_lock:
+            if self._tracked is None:
+                self._tracked = set(json.loads(self._meta().get("courses", "[]")))
+            return set(self._tracked)
+
+    def track(self, course_codes):
+        """Adds courses for the refresher to keep warm; wakes it when any are new."""
+        course_codes = set(course_codes)
+        self._tracked_courses()
+        with self._tracked_lock:
+            if course_codes - self._tracked:
+                self._tracked |= course_codes
+                self._wake.set()
+
+    def refresh(self):
+        """Syncs the tracked courses' PDFs with the listing, downloading only new or changed ones."""
+        with self._refresh_lock, tracing.span("store_refresh", "stage", store=self.name):
+            listing = self.get_listing()
+            if not listing:
+                return None  # Keep serving the last good copy
+
+            courses = self._tracked_courses()
+            stats = {"listed": len(listing), "courses": len(courses), "downloaded": 0, "unchanged": 0,
+                     "failed": 0}
+            listing = [(position, pdf) for position, pdf in enumerate(listing)
+                       if any(self.title_matches(code, pdf["title"]) for code in courses)]
+            with self._connect() as db:
+                known = {row[0]: row[1:] for row in
+                         db.execute("SELECT url, etag, last_modified, content_hash FROM pdfs")}
+            uncovered = set()  # Courses missing a PDF because its first download failed
+
+            for position, pdf in listing:
+                url = pdf["url"]
+                etag, last_modified, content_hash = known.get(url, (None, None, None))
+                headers = {}
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+
+                try:
+                    status_code, content, response_headers = self.fetch_pdf(url, headers)
+                    if status_code == 304 and url in known:
+                        new_dates = None
+                    else:
+                        new_hash = hashlib.sha256(content).hexdigest()
+                        new_dates = None if new_hash == content_hash else self.extract_pdf(content)
+                        etag = response_headers.get("ETag")
+                        last_modified = response_headers.get("Last-Modified")
+                        content_hash = new_hash
+                except Exception as e:
+                    print(f"⚠ Could not refresh {url}: {e}")
+                    stats["failed"] += 1
+                    if url not in known:  # A known PDF keeps its previous rows
+                        uncovered |= {code for code in courses if self.title_matches(code, pdf["title"])}
+                    continue
+
+                with self._connect() as db:
+                    if new_dates is None and url in known:
+                        stats["unchanged"] += 1
+                        db.execute("UPDATE pdfs SET title = ?, position = ?, etag = ?, last_modified = ? "
+                                   "WHERE url = ?", (pdf["title"], position, etag, last_modified, url))
+                    else:
+                        stats["downloaded"] += 1
+                        db.execute("INSERT OR REPLACE INTO pdfs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   (url, pdf["title"], etag, last_modified, content_hash,
+                                    json.dumps(new_dates or []), position, time.time()))
+
+            listed = [pdf["url"] for _, pdf in listing]
+            with self._connect() as db:
+                db.execute(f"DELETE FROM pdfs WHERE url NOT IN ({','.join('?' * len(listed))})", listed)
+                # Uncovered courses stay tracked, so lookups scrape them live until a refresh succeeds
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('courses', ?)",
+                           (json.dumps(sorted(courses - uncovered)),))
+                if stats["downloaded"] or stats["unchanged"] or not stats["failed"]:
+                    db.execute("INSERT OR REPLACE INTO meta VALUES ('last_refresh', ?)", (str(time.time()),))
+            return stats
+
+    def lookup(self, course_code):
+        """
+        Returns the stored date lists of every PDF matching the course, in listing
+        order, or None when the store is cold or stale and the caller should scrape.
+        """
+        found = self.lookup_many([course_code])
+        return None if found is None else found[course_code]
+
+    def lookup_many(self, course_codes):
+        """
+        lookup() for several courses with a single read: {course_code: [date lists]}, or
+        None when any of them is not covered yet (it is tracked from now on).
+        """
+        self.track(course_codes)
+        meta = self._meta()
+        last_refresh = float(meta.get("last_refresh") or 0)
+        if time.time() - last_refresh > self.max_age:
+            return None
+        if not set(course_codes) <= set(json.loads(meta.get("courses", "[]"))):
+            return None
+
+        with self._connect() as db:
+            rows = db.execute("SELECT title, dates FROM pdfs ORDER BY position").fetchall()
+
+        found = {course_code: [] for course_code in course_codes}
+        for title, dates in rows:
+            matching = [code for code in course_codes if self.title_matches(code, title)]
+            if matching:
+                dates = json.loads(dates)
+                for course_code in matching:
+                    found[course_code].append(dates)
+        return found
+
+    def start_refresher(self, interval=REFRESH_INTERVAL):
+        """Starts the daemon thread that refreshes the store every `interval` seconds."""
+        if self._thread and self._thread.is_alive():
+            return self._thread
+
+        def run():
+            while not self._stop.is_set():
+                self._wake.clear()  # Courses tracked from here on are picked up by this refresh
+                try:
+                    stats = self.refresh()
+                    if stats:
+                        print(f"🔄 Timetable store refreshed: {stats}")
+                except Exception as e:
+                    print(f"⚠ Timetable store refresh failed: {e}")
+                self._wake.wait(interval)  # Set early by stop_refresher() or a newly tracked course
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="timetable-store-refresher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop_refresher(self):
+        self._stop.set()
+        self._wake.set()
@@ -0,0 +1,82 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+_POSSESSIVE = re.compile(r"['’]s\b")
+_WORD = re.compile(r"[a-z]+")
+
+
+def normalize_word(word):
+    """Folds simple English plurals so "trees", "circuits" and "theories" match their topic."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("es") and word[:-2].endswith(("ss", "x", "ch", "sh")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercase words with possessives dropped; hyphens, slashes and punctuation separate words."""
+    return [normalize_word(word) for word in _WORD.findall(_POSSESSIVE.sub("", text.lower()))]
+
+
+def topic_variants(topic, stopwords=frozenset()):
+    """
+    Word sequences that count as a mention of a topic: the full phrase and the
+    phrase with stopwords removed, which is how it reads in cleaned PDF text
+    ("Degree of vertex" -> "degree vertex").
+    """
+    words = _WORD.findall(_POSSESSIVE.sub("", topic.lower()))
+    variants = {tuple(normalize_word(word) for word in words)}
+    without_stopwords = tuple(normalize_word(word) for word in words if word not in stopwords)
+    if without_stopwords:
+        variants.add(without_stopwords)
+    return {variant for variant in variants if variant}
+
+
+@lru_cache(maxsize=64)
+def build_matcher(topics, stopwords=frozenset()):
+    """
+    Builds a word-level trie over every variant of every topic. Built once per
+    (topic list, stopword set) and cached, so repeated analyses of a course reuse it.
+    """
+    trie = {}
+    for topic in topics:
+        for variant in topic_variants(topic, stopwords):
+            node = trie
+            for word in variant:
+                node = node.setdefault(word, {})
+            node.setdefault(None, topic)  # First topic listed wins if two share a variant
+    return trie
+
+
+def count_topics(text, topics, stopwords=frozenset()):
+    """
+    Counts topic mentions in one pass over the text. At each word the longest
+    matching topic phrase wins and matches don't overlap, so "minimal spanning
+    tree" is not also counted as "spanning tree" or "tree".
+    """
+    trie = build_matcher(tuple(topics), frozenset(stopwords))
+    words = tokenize(text)
+    counts = Counter()
+
+    i = 0
+    while i < len(words):
+        node = trie
+        j = i
+        match = None
+        while j < len(words) and words[j] in node:
+            node = node[words[j]]
+            j += 1
+            if None in node:
+                match = (j, node[None])
+
+        if match:
+            i, topic = match
+            counts[topic] += 1
+        else:
+            i += 1
+
+    return counts
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+
+from cache_paths import cache_path
+
+NUM_TOPICS = 5
+PASSES = 10            # Passes for the first training run; updates do one online pass
+MIN_VOCABULARY = 10    # Skip LDA if too few distinct words
+# LdaMulticore worker processes (KTU_LDA_WORKERS); only used on the main thread
+WORKERS = int(os.environ.get("KTU_LDA_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+
+
+def _use_multicore():
+    """
+    LdaMulticore forks its workers on Linux, which can deadlock when other threads are
+    running (the GUI's task pool, the exam-prep pipeline), so only the main thread may.
+    """
+    return WORKERS > 1 and threading.current_thread() is threading.main_thread()
+
+
+def paper_id(text):
+    """Stable ID for a paper's cleaned text, so the same paper is never folded in twice."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _model_paths(course_code):
+    folder = os.path.dirname(cache_path("lda", course_code.upper(), "x"))
+    return {
+        "model": os.path.join(folder, "lda.model"),
+        "dictionary": os.path.join(folder, "lda.dict"),
+        "meta": os.path.join(folder, "meta.json"),
+    }
+
+
+def load_course_model(course_code):
+    """Returns (lda_model, dictionary, meta) saved for a course, or None."""
+    from gensim import corpora, models
+
+    paths = _model_paths(course_code)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    try:
+        with open(paths["meta"], "r") as file:
+            meta = json.load(file)
+        return models.LdaModel.load(paths["model"]), corpora.Dictionary.load(paths["dictionary"]), meta
+    except (OSError, ValueError, EOFError) as e:
+        print(f"⚠ Ignoring unreadable topic model for {course_code}: {e}")
+        return None
+
+
+def save_course_model(course_code, lda_model, dictionary, meta):
+    paths = _model_paths(course_code)
+    lda_model.save(paths["model"])
+    dictionary.save(paths["dictionary"])
+    with open(paths["meta"], "w") as file:
+        json.dump(meta, file)
+
+
+def train_model(documents, num_topics=NUM_TOPICS):
+    """Trains an LDA model with one document per paper (multicore on the main thread). (model, dictionary) or None."""
+    from gensim import corpora, models
+
+    dictionary = corpora.Dictionary(documents)
+    if len(documents) >= 5:
+        dictionary.filter_extremes(no_below=2, no_above=0.9, keep_n=None)  # Drop one-off and boilerplate words
+    if len(dictionary) < MIN_VOCABULARY:
+        return None
+
+    corpus = [dictionary.doc2bow(document) for document in documents]
+    if _use_multicore():
+        lda_model = models.LdaMulticore(corpus, num_topics=num_topics, id2word=dictionary,
+                                        passes=PASSES, workers=WORKERS, random_state=42)
+    else:
+        lda_model = models.LdaModel(corpus, num_topics=num_topics, id2word=dictionary,
+                                    passes=PASSES, random_state=42)
+    return lda_model, dictionary
+
+
+def update_model(lda_model, corpus):
+    """Online update; a saved multicore model is updated in-process when it may not fork."""
+    from gensim import models
+
+    if isinstance(lda_model, models.LdaMulticore) and not _use_multicore():
+        models.LdaModel.update(lda_model, corpus)  # The single-process E-step of the base class
+    else:
+        lda_model.update(corpus)
+
+
+def course_topic_model(course_code, paper_texts, num_topics=NUM_TOPICS):
+    """
+    Returns the LDA model for a course, kept up to date with the given papers.
+
+    The first call trains on every paper and saves the model and dictionary under
+    .ktu_cache/lda/<course>. Later calls only fold papers that haven't been seen
+    before into the saved model with an online update. The vocabulary is fixed
+    at first training, so words new to the course are ignored until a retrain
+    (delete the folder, or ask for a different num_topics).
+    """
+    papers = {paper_id(text): text.split() for text in paper_texts if text.strip()}
+
+    saved = load_course_model(course_code)
+    if saved and saved[2].get("num_topics") == num_topics:
+        lda_model, dictionary, meta = saved
+        seen = set(meta.get("papers", []))
+        new_ids = [pid for pid in papers if pid not in seen]
+        if new_ids:
+            print(f"🔄 Updating {course_code} topic model with {len(new_ids)} new paper(s)...")
+            update_model(lda_model, [dictionary.doc2bow(papers[pid]) for pid in new_ids])
+            meta["papers"] = sorted(seen.union(new_ids))
+            save_course_model(course_code, lda_model, dictionary, meta)
+        return lda_model
+
+    trained = train_model(list(papers.values()), num_topics)
+    if trained is None:
+        return None
+    lda_model, dictionary = trained
+    save_course_model(course_code, lda_model, dictionary, {"num_topics": num_topics, "papers": sorted(papers)})
+    return lda_model
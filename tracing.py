@@ -0,0 +1,113 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Opt-in: KTU_TRACE=path.json (or --trace on the CLIs) records spans and counters
+# as Chrome trace events, viewable in chrome://tracing or ui.perfetto.dev
+TRACE_ENV = "KTU_TRACE"
+
+_events = []
+_counters = {}
+_lock = threading.Lock()
+_path = None
+_start = time.perf_counter()
+
+
+def enabled():
+    return _path is not None
+
+
+def enable(path):
+    """Starts recording; the trace is written to `path` at exit (or on flush())."""
+    global _path
+    first_time = _path is None
+    _path = path
+    # Worker processes inherit the environment; only this process writes the file
+    os.environ["KTU_TRACE_PID"] = str(os.getpid())
+    if first_time:
+        atexit.register(flush)
+
+
+def _now_us():
+    return (time.perf_counter() - _start) * 1_000_000
+
+
+def _record(event):
+    event.update(pid=os.getpid(), tid=threading.get_ident())
+    with _lock:
+        _events.append(event)
+
+
+@contextmanager
+def span(name, category="stage", **args):
+    """Times a block as one complete ("X") event; a no-op unless tracing is enabled."""
+    if _path is None:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        _record({"name": name, "cat": category, "ph": "X", "ts": start, "dur": _now_us() - start,
+                 "args": args})
+
+
+def traced(name=None, category="stage"):
+    """Decorator form of span(); the span is named after the function by default."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _path is None:
+                return function(*args, **kwargs)
+            with span(name or function.__name__, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    """Adds to a running counter (bytes, pages, tokens, cache hits ...) and records its new total."""
+    if _path is None:
+        return
+    with _lock:
+        total = _counters[name] = _counters.get(name, 0) + value
+    _record({"name": name, "cat": "counter", "ph": "C", "ts": _now_us(), "args": {name: total}})
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def flush(path=None):
+    """Writes every event recorded so far as Chrome trace-event JSON."""
+    path = path or _path
+    if path is None:
+        return None
+    with _lock:
+        events = list(_events)
+        totals = dict(_counters)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": totals}}, file)
+    os.replace(tmp_path, path)
+    return path
+
+
+def enable_from_argv(argv):
+    """Handles a --trace[=path] CLI flag; returns argv without it."""
+    remaining = []
+    for arg in argv:
+        if arg == "--trace" or arg.startswith("--trace="):
+            enable(arg.partition("=")[2] or "ktu_trace.json")
+        else:
+            remaining.append(arg)
+    return remaining
+
+
+if os.environ.get(TRACE_ENV) and os.environ.get("KTU_TRACE_PID", str(os.getpid())) == str(os.getpid()):
+    enable(os.environ[TRACE_ENV])
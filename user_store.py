@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Registered students live in SQLite (KTU_USER_DB); the old JSON file is imported once
+USER_DB_FILE = os.environ.get("KTU_USER_DB", "user_data.db")
+LEGACY_JSON_FILE = "user_data.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    semester TEXT NOT NULL DEFAULT '',
+    branch TEXT NOT NULL DEFAULT '',
+    scheme TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+FIELDS = ("name", "semester", "branch", "scheme")
+
+
+class UserExistsError(ValueError):
+    """Raised when registering a user ID that is already taken."""
+
+
+class UserStore:
+    """
+    Indexed, transactional store of registered users, shared by the CLI and the GUI.
+    Lookups by user ID go through the primary-key index; every write is its own
+    transaction, so concurrent threads cannot leave a half-written file behind.
+    """
+
+    def __init__(self, path=USER_DB_FILE, legacy_json=LEGACY_JSON_FILE):
+        self.path = path
+        self.legacy_json = legacy_json
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        """A connection that commits (or rolls back) and is closed when the block ends."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            if not self._ready:
+                with self._init_lock:
+                    if not self._ready:
+                        db.execute("PRAGMA journal_mode=WAL")
+                        db.executescript(SCHEMA)
+                        self._migrate(db)
+                        self._ready = True
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _migrate(self, db):
+        """One-time import of user_data.json, recorded in meta so it never runs twice."""
+        if db.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return
+        users = {}
+        if self.legacy_json and os.path.exists(self.legacy_json) and os.path.getsize(self.legacy_json) > 0:
+            try:
+                with open(self.legacy_json, "r") as file:
+                    users = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Could not import {self.legacy_json}: {e}")
+                return  # Try again next start instead of marking it done
+
+        with db:
+            db.executemany(
+                "INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?, ?)",
+                [(str(user_id), details.get("name", str(user_id)), str(details.get("semester", "")),
+                  str(details.get("branch", "")), str(details.get("scheme", "")))
+                 for user_id, details in users.items()])
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_json', ?)", (str(len(users)),))
+        if users:
+            print(f"📥 Imported {len(users)} users from {self.legacy_json}")
+
+    @staticmethod
+    def _row_to_user(row):
+        return dict(zip(FIELDS, row))
+
+    def get(self, user_id):
+        """The user's details dict, or None."""
+        with self._connect() as db:
+            row = db.execute("SELECT name, semester, branch, scheme FROM users WHERE user_id = ?",
+                             (str(user_id),)).fetchone()
+        return self._row_to_user(row) if row else None
+
+    def exists(self, user_id):
+        with self._connect() as db:
+            return db.execute("SELECT 1 FROM users WHERE user_id = ?", (str(user_id),)).fetchone() is not None
+
+    def add(self, user_id, name, semester="", branch="", scheme=""):
+        """Registers a user; raises UserExistsError if the ID is taken."""
+        user = {"name": name, "semester": semester, "branch": branch, "scheme": scheme}
+        try:
+            with self._connect() as db:
+                db.execute("INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+                           (str(user_id), name, semester, branch, scheme))
+        except sqlite3.IntegrityError:
+            raise UserExistsError(f"User ID {user_id} is already registered")
+        return user
+
+    def update(self, user_id, **details):
+        """Changes some of a user's fields; returns False for an unknown user."""
+        details = {field: value for field, value in details.items() if field in FIELDS}
+        if not details:
+            return self.exists(user_id)
+        assignments = ", ".join(f"{field} = ?" for field in details)
+        with self._connect() as db:
+            cursor = db.execute(f"UPDATE users SET {assignments} WHERE user_id = ?",
+                                (*details.values(), str(user_id)))
+        return cursor.rowcount > 0
+
+    def delete(self, user_id):
+        with self._connect() as db:
+            return db.execute("DELETE FROM users WHERE user_id = ?", (str(user_id),)).rowcount > 0
+
+    def count(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def list(self, limit=None, offset=0):
+        """[(user_id, details), ...] in registration order, one page at a time."""
+        with self._connect() as db:
+            rows = db.execute("SELECT user_id, name, semester, branch, scheme FROM users "
+                              "ORDER BY rowid LIMIT ? OFFSET ?",
+                              (-1 if limit is None else limit, offset)).fetchall()
+        return [(row[0], self._row_to_user(row[1:])) for row in rows]
+
+
+# Shared instance used by UtilVer, test 2.py and the GUI
+users = UserStore()